@@ -1,16 +1,121 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+import os
+import sys
+import time
+import logging
+import click
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, g, stream_with_context, session, abort
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, timedelta, date
 from functools import wraps
-from models import db, User, Doctor, Patient, Appointment, Treatment, Department, DoctorAvailability
+from sqlalchemy.exc import OperationalError
+from models import db, REPLICA_BIND, User, Doctor, Patient, Appointment, Treatment, Department, WeeklyAvailability
+from services import (keyset_paginate, decode_cursor, eager, create_missing_indexes, drop_stale_unique_constraints,
+                      setup_search_index, search_matches,
+                      setup_counters, reconcile_counters, read_counters, read_availability_version,
+                      read_schedule_version, free_slots, is_open, parse_time, canonical_time,
+                      book_slot, next_free_slot, expand_availability, save_availability, save_weekly_template,
+                      refresh_slot_index, extend_slot_index, earliest_slots, VersionedCache, read_catalog_version,
+                      load_departments, load_doctors, load_department_stats, DOCTOR_FIELDS, APPOINTMENT_FIELDS,
+                      parse_fields, select_fields, stream_json, EXPORT_FORMATS, export_appointments,
+                      import_users, PasswordHasher, resolve_identity, forget_identity,
+                      engine_options, apply_sqlite_profile, sqlite_settings, ReplicaSync, seed_synthetic,
+                      SQLTracer, QueryBudgetExceeded, Metrics)
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'just_a_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hospital.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('HMS_DATABASE_URI', 'sqlite:///hospital.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLITE_PROFILE'] = os.environ.get('HMS_SQLITE_PROFILE', 'tuned')
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+    app.config['SQLALCHEMY_DATABASE_URI'],
+    pool_size=int(os.environ.get('HMS_DB_POOL_SIZE', 10)),
+    max_overflow=int(os.environ.get('HMS_DB_MAX_OVERFLOW', 20)),
+    pool_timeout=int(os.environ.get('HMS_DB_POOL_TIMEOUT', 30))
+)
+# Optional local read replica (a SQLite file synced from the primary), e.g. sqlite:///hospital-replica.db
+app.config['REPLICA_DATABASE_URI'] = os.environ.get('HMS_REPLICA_URI')
+app.config['REPLICA_SYNC_INTERVAL'] = float(os.environ.get('HMS_REPLICA_SYNC_INTERVAL', 5))
+# Reads never come from a replica older than this many seconds
+app.config['REPLICA_MAX_LAG'] = float(os.environ.get('HMS_REPLICA_MAX_LAG', 15))
+if app.config['REPLICA_DATABASE_URI']:
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: app.config['REPLICA_DATABASE_URI']}
+app.config['PAGE_SIZE'] = 25
+app.config['MAX_PAGE_SIZE'] = 100
+app.config['SLOT_MINUTES'] = 15
+app.config['AVAILABILITY_DAYS'] = int(os.environ.get('HMS_AVAILABILITY_DAYS', 28))
+app.config['CATALOG_CACHE_SIZE'] = 256
+app.config['CATALOG_CACHE_TTL'] = 300
+app.config['API_MAX_AGE'] = 30
+app.config['API_PAGE_SIZE'] = 100
+app.config['API_MAX_PAGE_SIZE'] = 1000
+app.config['EXPORT_CHUNK_SIZE'] = 1000
+# Raising the cost (or switching algorithm) upgrades each stored hash the next time its user logs in;
+# plain 'pbkdf2:sha256' follows werkzeug's current default iterations
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('HMS_PASSWORD_HASH_METHOD', 'pbkdf2:sha256')
+# Seconds the signed session may vouch for a user's role and profile (0: look up every request)
+app.config['IDENTITY_TTL'] = int(os.environ.get('HMS_IDENTITY_TTL', 60))
+app.config['PASSWORD_HASH_WORKERS'] = int(os.environ.get('HMS_PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+# Statements slower than this are logged (to SQL_SLOW_QUERY_LOG if set, else the app log)
+app.config['SQL_SLOW_QUERY_MS'] = float(os.environ.get('HMS_SQL_SLOW_QUERY_MS', 200))
+app.config['SQL_SLOW_QUERY_LOG'] = os.environ.get('HMS_SQL_SLOW_QUERY_LOG')
+# A request running the same query shape this many times is logged as a likely N+1
+app.config['SQL_REPEAT_THRESHOLD'] = int(os.environ.get('HMS_SQL_REPEAT_THRESHOLD', 10))
+app.config['SERVER_TIMING'] = os.environ.get('HMS_SERVER_TIMING') == '1'
+# Raise instead of logging when a view goes over its @query_budget (turn on in tests)
+app.config['SQL_ENFORCE_BUDGETS'] = os.environ.get('HMS_SQL_ENFORCE_BUDGETS') == '1'
+# Shared by all worker processes so /metrics reports their sum; empty it on deploy
+app.config['METRICS_DIR'] = os.environ.get('HMS_METRICS_DIR')
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('HMS_METRICS_FLUSH_INTERVAL', 1))
+# Addresses that may scrape /metrics without logging in (admins always may), comma-separated
+app.config['METRICS_ALLOW'] = [a.strip() for a in os.environ.get('HMS_METRICS_ALLOW', '127.0.0.1,::1').split(',') if a.strip()]
 
 db.init_app(app)
+with app.app_context():
+    for engine in db.engines.values():
+        apply_sqlite_profile(engine, app.config['SQLITE_PROFILE'])
+
+sql_tracer = SQLTracer(slow_ms=app.config['SQL_SLOW_QUERY_MS'])
+with app.app_context():
+    for engine in db.engines.values():
+        sql_tracer.instrument(engine)
+if app.config['SQL_SLOW_QUERY_LOG']:
+    slow_log = logging.getLogger('services.sql_trace')
+    slow_log.addHandler(logging.FileHandler(app.config['SQL_SLOW_QUERY_LOG']))
+    slow_log.propagate = False  # the file replaces the app log, it does not copy it
+
+metrics = Metrics(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+metrics.counter('hms_http_requests_total', 'HTTP requests by endpoint, method and status.')
+metrics.histogram('hms_http_request_duration_seconds', 'HTTP request latency by endpoint and method.')
+metrics.gauge('hms_http_requests_in_flight', 'HTTP requests being handled, by endpoint.')
+metrics.gauge('hms_db_pool_connections', 'Pooled database connections by bind and state.')
+metrics.counter('hms_bookings_total', 'Appointments booked.')
+metrics.counter('hms_cancellations_total', 'Appointments cancelled.')
+metrics.counter('hms_completions_total', 'Appointments completed with a treatment record.')
+metrics.counter('hms_login_failures_total', 'Failed logins by reason.')
+with app.app_context():
+    pools = {bind or 'default': engine.pool for bind, engine in db.engines.items()}
+
+@metrics.collector
+def pool_stats():
+    stats = []
+    for bind, pool in pools.items():
+        if not hasattr(pool, 'checkedout'):
+            continue
+        stats.append(('hms_db_pool_connections', {'bind': bind, 'state': 'checked_out'}, pool.checkedout()))
+        stats.append(('hms_db_pool_connections', {'bind': bind, 'state': 'idle'}, pool.checkedin()))
+        stats.append(('hms_db_pool_connections', {'bind': bind, 'state': 'overflow'}, max(0, pool.overflow())))
+    return stats
+
+replica = None
+if app.config['REPLICA_DATABASE_URI']:
+    # The engines' URLs, not the config strings: Flask-SQLAlchemy puts relative
+    # SQLite paths under the instance folder, and the sync must copy those files
+    with app.app_context():
+        replica = ReplicaSync(db.engines[None].url, db.engines[REPLICA_BIND].url,
+                              interval=app.config['REPLICA_SYNC_INTERVAL'])
+
+catalog_cache = VersionedCache(maxsize=app.config['CATALOG_CACHE_SIZE'], ttl=app.config['CATALOG_CACHE_TTL'])
+password_hasher = PasswordHasher(app.config['PASSWORD_HASH_METHOD'], app.config['PASSWORD_HASH_WORKERS'])
 
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -18,7 +123,7 @@ login_manager.login_view = 'login'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return resolve_identity(db.session, session, int(user_id), app.config['IDENTITY_TTL'])
 
 def role_required(role):
     def decorator(f):
@@ -34,6 +139,158 @@ def role_required(role):
         return decorated_function
     return decorator
 
+def replica_reads(f):
+    """Let GET requests to this view read from the replica when it is fresh enough."""
+    f.replica_reads = True
+    return f
+
+def pin_to_primary():
+    """Keep this client on the primary until the replica has a snapshot newer than now."""
+    session['primary_since'] = time.time()
+
+def query_budget(max_queries):
+    """Flag requests to this view that run more than ``max_queries`` SQL statements."""
+    def decorator(f):
+        f.query_budget = max_queries
+        return f
+    return decorator
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.metrics_endpoint = request.endpoint or 'unmatched'
+    metrics.inc('hms_http_requests_in_flight', endpoint=g.metrics_endpoint)
+
+@app.before_request
+def start_sql_trace():
+    g.sql_log = sql_tracer.start(request.endpoint)
+
+@app.before_request
+def route_reads():
+    if replica is None:
+        return
+    replica.start()
+    view = app.view_functions.get(request.endpoint)
+    g.db_replica = (request.method == 'GET' and getattr(view, 'replica_reads', False)
+                    and replica.serves(app.config['REPLICA_MAX_LAG'], since=session.get('primary_since', 0)))
+
+# Registered first so it runs last: after_request hooks run in reverse order,
+# and a hook that raises (report_sql over budget) must not leave a 200 behind
+@app.after_request
+def note_status(response):
+    g.response_status = response.status_code
+    return response
+
+@app.after_request
+def pin_writers(response):
+    if replica is not None and g.get('db_wrote'):
+        pin_to_primary()
+    return response
+
+@app.after_request
+def report_sql(response):
+    log = g.get('sql_log')
+    if log is None:
+        return response
+    if app.config['SERVER_TIMING']:
+        total = (time.perf_counter() - g.request_started) * 1000
+        response.headers['Server-Timing'] = (f'db;dur={log.seconds * 1000:.2f};desc="{log.count} queries", '
+                                             f'app;dur={total:.2f}')
+    budget = getattr(app.view_functions.get(request.endpoint), 'query_budget', None)
+    if budget is not None and log.count > budget:
+        message = f'{request.endpoint} ran {log.summary()}, budget is {budget}'
+        if app.config['SQL_ENFORCE_BUDGETS']:
+            raise QueryBudgetExceeded(message)
+        app.logger.warning(message)
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc):
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is None:
+        return
+    metrics.dec('hms_http_requests_in_flight', endpoint=endpoint)
+    metrics.observe('hms_http_request_duration_seconds', time.perf_counter() - g.request_started,
+                    endpoint=endpoint, method=request.method)
+    status = 500 if exc is not None else g.get('response_status', 500)
+    metrics.inc('hms_http_requests_total', endpoint=endpoint, method=request.method, status=status)
+    metrics.flush()
+
+@app.teardown_request
+def finish_sql_trace(exc):
+    log = g.pop('sql_log', None)
+    if log is None:
+        return
+    sql_tracer.stop(log)
+    for shape, count in log.repeated(app.config['SQL_REPEAT_THRESHOLD']):
+        app.logger.warning('possible N+1 in %s: %d x %s', request.endpoint, count, shape)
+
+def page_args():
+    per_page = request.args.get('per_page', type=int) or app.config['PAGE_SIZE']
+    return {
+        'after': request.args.get('after'),
+        'before': request.args.get('before'),
+        'per_page': max(1, min(per_page, app.config['MAX_PAGE_SIZE']))
+    }
+
+def availability_days():
+    today = date.today()
+    return [today + timedelta(days=i) for i in range(app.config['AVAILABILITY_DAYS'])]
+
+def refresh_slots(start, end=None, doctor_ids=None):
+    refresh_slot_index(db.session, start, end or start, app.config['SLOT_MINUTES'], doctor_ids)
+
+def catalog_version():
+    if 'catalog_version' not in g:
+        g.catalog_version = read_catalog_version(db.session)
+    return g.catalog_version
+
+def schedule_version():
+    if 'schedule_version' not in g:
+        g.schedule_version = read_schedule_version(db.session)
+    return g.schedule_version
+
+def department_stats():
+    today = date.today()
+    return catalog_cache.get_or_load(('department_stats', today), (catalog_version(), schedule_version()),
+                                     lambda: load_department_stats(db.session, today, today + timedelta(days=6)))
+
+def cached_departments():
+    return catalog_cache.get_or_load(('departments',), catalog_version(), load_departments)
+
+def cached_doctors(department_id=None):
+    return catalog_cache.get_or_load(('doctors', department_id), catalog_version(),
+                                     lambda: load_doctors(department_id))
+
+def conditional_json(etag, build):
+    """JSON response tagged with a strong ``etag``; ``build`` only runs on a cache miss."""
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={app.config['API_MAX_AGE']}, must-revalidate"
+    return response
+
+def api_error(message, status):
+    return jsonify({'error': message}), status
+
+def stream_page(query, spec, keyset):
+    """Stream one cursor page of ``query`` with the fields picked by ``?fields=``."""
+    try:
+        fields = parse_fields(request.args.get('fields'), spec)
+    except ValueError as e:
+        return api_error(str(e), 400)
+    limit = request.args.get('limit', type=int) or app.config['API_PAGE_SIZE']
+    limit = max(1, min(limit, app.config['API_MAX_PAGE_SIZE']))
+    # A cursor that does not decode would otherwise restart the stream from page one
+    after = request.args.get('after')
+    if after and decode_cursor(after, keyset) is None:
+        return api_error('invalid cursor', 400)
+    query = select_fields(query, spec, fields, keyset)
+    body = stream_json(query, fields, keyset, after=after, limit=limit)
+    return app.response_class(stream_with_context(body), mimetype='application/json')
+
 def init_db():
     with app.app_context():
         db.create_all()
@@ -56,13 +313,143 @@ def init_db():
         if not admin:
             admin = User(
                 email='admin@hospital.com',
-                password=generate_password_hash('admin123', method='pbkdf2:sha256'),
+                password=password_hasher.hash('admin123'),
                 role='admin',
                 is_active=True
             )
             db.session.add(admin)
             db.session.commit()
             print("Admin user created. Email: admin@hospital.com, Password: admin123")
+        
+        rebuilt = drop_stale_unique_constraints(db.engine, db.metadata)
+        if rebuilt:
+            print(f"Rebuilt {', '.join(rebuilt)} to drop outdated unique constraints.")
+        
+        created = create_missing_indexes(db.engine, db.metadata)
+        if created:
+            print(f"Created {len(created)} missing index(es).")
+        
+        if not setup_search_index(db.engine):
+            print("FTS5 not available; directory search will use LIKE.")
+        
+        setup_counters(db.engine)
+        
+        days = availability_days()
+        refresh_slots(days[0], days[-1])
+        db.session.commit()
+
+@app.cli.command('db-settings')
+def db_settings_command():
+    """Show the engine profile, pool size and the pragmas a connection actually runs with."""
+    print(f"profile       {app.config['SQLITE_PROFILE']}")
+    print(f"pool          {db.engine.pool.status()}")
+    if db.engine.dialect.name == 'sqlite':
+        for name, value in sqlite_settings(db.engine).items():
+            print(f"{name:<14}{value}")
+
+@app.cli.command('seed-data')
+@click.option('--doctors', default=500, show_default=True)
+@click.option('--patients', default=200000, show_default=True)
+@click.option('--appointments', default=2000000, show_default=True)
+@click.option('--password', default='password123', show_default=True, help='Password for every generated account.')
+@click.option('--seed', default=42, show_default=True, help='Random seed; the same seed gives the same data.')
+@click.option('--batch-size', default=5000, show_default=True)
+def seed_data_command(doctors, patients, appointments, password, seed, batch_size):
+    """Bulk-generate synthetic doctors, patients, appointments and treatments."""
+    started = time.perf_counter()
+    counts = seed_synthetic(db.engine, doctors=doctors, patients=patients, appointments=appointments,
+                            password_hash=password_hasher.hash(password), seed=seed, batch_size=batch_size,
+                            future_days=app.config['AVAILABILITY_DAYS'], slot_minutes=app.config['SLOT_MINUTES'])
+    days = availability_days()
+    refresh_slots(days[0], days[-1])
+    db.session.commit()
+    for table, count in counts.items():
+        print(f"{table:<22}{count}")
+    print(f"Done in {time.perf_counter() - started:.1f}s. Accounts are seed-<role>-<user id>@hms.test / {password}")
+
+@app.cli.command('create-indexes')
+def create_indexes_command():
+    """Build missing indexes on an existing database.
+
+    Tables the models added since the database was made (counters, the slot
+    index) are created; existing tables are only rebuilt if they still carry a
+    unique constraint the models no longer declare (the old one-row-per-slot
+    key on appointments).
+    """
+    db.create_all()
+    rebuilt = drop_stale_unique_constraints(db.engine, db.metadata)
+    for table in rebuilt:
+        print(f"Rebuilt table {table}")
+    created = create_missing_indexes(db.engine, db.metadata)
+    for name in created:
+        print(f"Created index {name}")
+    if not created:
+        print("All indexes already exist.")
+    setup_counters(db.engine)  # installs any missing triggers, including those dropped with a rebuilt table
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Create the FTS5 directory search tables and refill them from scratch."""
+    if setup_search_index(db.engine, rebuild=True):
+        print("Search index rebuilt.")
+    else:
+        print("FTS5 is not available in this SQLite build.")
+
+@app.cli.command('rebuild-slot-index')
+def rebuild_slot_index_command():
+    """Recompute the free-slot bitmaps for the whole availability horizon.
+
+    Not needed for the rolling horizon: earliest-slots indexes newly reachable
+    days on first use. Use it to repair the index after editing data directly.
+    """
+    days = availability_days()
+    count = refresh_slot_index(db.session, days[0], days[-1], app.config['SLOT_MINUTES'])
+    db.session.commit()
+    print(f"Indexed {count} doctor-day(s) with open slots.")
+
+@app.cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Rebuild the dashboard counters from scratch."""
+    reconcile_counters(db.engine)
+    for (entity, status), value in sorted(read_counters(db.session).items()):
+        print(f"{entity:<14}{status or 'all':<12}{value}")
+
+@app.cli.command('export-appointments')
+@click.option('--format', 'fmt', type=click.Choice(sorted(EXPORT_FORMATS)), default='csv')
+@click.option('--start', type=click.DateTime(['%Y-%m-%d']), help='First appointment date to include.')
+@click.option('--end', type=click.DateTime(['%Y-%m-%d']), help='Last appointment date to include.')
+@click.option('--status', type=click.Choice(['Booked', 'Completed', 'Cancelled']))
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), help='Write here instead of stdout.')
+def export_appointments_command(fmt, start, end, status, output):
+    """Stream appointments with patient, doctor, department and treatment as CSV or NDJSON."""
+    chunks = export_appointments(db.session, fmt, start and start.date(), end and end.date(), status,
+                                 chunk_size=app.config['EXPORT_CHUNK_SIZE'])
+    out = open(output, 'w', newline='', encoding='utf-8') if output else sys.stdout
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
+
+@app.cli.command('import-users')
+@click.argument('role', type=click.Choice(['patient', 'doctor']))
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--batch-size', default=1000, show_default=True, help='Rows per transaction.')
+@click.option('--workers', type=int, help='Password hashing processes (default: one per CPU).')
+def import_users_command(role, csv_file, batch_size, workers):
+    """Create patient or doctor accounts in bulk from a CSV file.
+
+    Patient columns: email, password, name, phone, dob, gender, address,
+    emergency_contact, blood_group. Doctor columns: email, password, name,
+    phone, department (name or id), qualification, experience_years,
+    consultation_fee.
+    """
+    result = import_users(db.session, role, csv_file, batch_size=batch_size, workers=workers,
+                          method=app.config['PASSWORD_HASH_METHOD'])
+    for line, message in result.errors:
+        print(f"line {line}: {message}")
+    print(f"Imported {result.created} {role}(s), {len(result.errors)} row(s) rejected.")
 
 @app.route('/')
 def index():
@@ -75,6 +462,13 @@ def index():
             return redirect(url_for('patient_dashboard'))
     return render_template('index.html')
 
+@app.route('/metrics')
+def prometheus_metrics():
+    if request.remote_addr not in app.config['METRICS_ALLOW'] and not (
+            current_user.is_authenticated and current_user.role == 'admin'):
+        abort(403)
+    return app.response_class(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if current_user.is_authenticated:
@@ -86,12 +480,20 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         
-        if user and check_password_hash(user.password, password):
+        if user and password_hasher.verify(user.password, password):
             if not user.is_active:
+                metrics.inc('hms_login_failures_total', reason='deactivated')
                 flash('Your account has been deactivated. Please contact admin.', 'danger')
                 return redirect(url_for('login'))
             
+            if password_hasher.needs_rehash(user.password):
+                user.password = password_hasher.hash(password)
+                db.session.commit()
+            
+            forget_identity(session)
             login_user(user)
+            if replica is not None:
+                pin_to_primary()
             flash('Login successful!', 'success')
             
             next_page = request.args.get('next')
@@ -105,6 +507,7 @@ def login():
             elif user.role == 'patient':
                 return redirect(url_for('patient_dashboard'))
         else:
+            metrics.inc('hms_login_failures_total', reason='invalid_credentials')
             flash('Invalid email or password.', 'danger')
     
     return render_template('login.html')
@@ -131,7 +534,7 @@ def register():
         
         user = User(
             email=email,
-            password=generate_password_hash(password, method='pbkdf2:sha256'),
+            password=password_hasher.hash(password),
             role='patient',
             is_active=True
         )
@@ -160,19 +563,23 @@ def register():
 @login_required
 def logout():
     logout_user()
+    forget_identity(session)
     flash('Logged out successfully.', 'info')
     return redirect(url_for('index'))
 
 @app.route('/admin/dashboard')
+@replica_reads
 @login_required
 @role_required('admin')
 def admin_dashboard():
-    total_doctors = Doctor.query.count()
-    total_patients = Patient.query.count()
-    total_appointments = Appointment.query.count()
-    pending_appointments = Appointment.query.filter_by(status='Booked').count()
+    counters = read_counters(db.session)
+    total_doctors = counters.get(('doctors', ''), 0)
+    total_patients = counters.get(('patients', ''), 0)
+    total_appointments = counters.get(('appointments', ''), 0)
+    pending_appointments = counters.get(('appointments', 'Booked'), 0)
     
-    recent_appointments = Appointment.query.order_by(Appointment.created_at.desc()).limit(10).all()
+    recent_appointments = eager(Appointment.query, 'patient', 'doctor').order_by(
+        Appointment.created_at.desc()).limit(10).all()
     
     return render_template('admin/dashboard.html',
                          total_doctors=total_doctors,
@@ -182,21 +589,28 @@ def admin_dashboard():
                          recent_appointments=recent_appointments)
 
 @app.route('/admin/doctors')
+@replica_reads
+@query_budget(5)
 @login_required
 @role_required('admin')
 def admin_doctors():
     search_query = request.args.get('search', '')
     
-    if search_query:
-        doctors = Doctor.query.filter(
+    matches = search_matches(db.engine, 'doctors', search_query) if search_query else None
+    if matches is not None:
+        query = Doctor.query.join(matches, matches.c.id == Doctor.id)
+    elif search_query:
+        query = Doctor.query.filter(
             db.or_(
                 Doctor.name.ilike(f'%{search_query}%'),
                 Department.name.ilike(f'%{search_query}%')
             )
-        ).join(Department).all()
+        ).join(Department)
     else:
-        doctors = Doctor.query.all()
+        query = Doctor.query
     
+    query = eager(query, 'user', 'department')
+    doctors = keyset_paginate(query, [Doctor.name, Doctor.id], **page_args())
     return render_template('admin/doctors.html', doctors=doctors, search_query=search_query)
 
 @app.route('/admin/doctor/add', methods=['GET', 'POST'])
@@ -219,7 +633,7 @@ def admin_add_doctor():
         
         user = User(
             email=email,
-            password=generate_password_hash(password, method='pbkdf2:sha256'),
+            password=password_hasher.hash(password),
             role='doctor',
             is_active=True
         )
@@ -241,7 +655,7 @@ def admin_add_doctor():
         flash('Doctor added successfully!', 'success')
         return redirect(url_for('admin_doctors'))
     
-    departments = Department.query.all()
+    departments = cached_departments()
     return render_template('admin/add_doctor.html', departments=departments)
 
 @app.route('/admin/doctor/edit/<int:doctor_id>', methods=['GET', 'POST'])
@@ -262,7 +676,7 @@ def admin_edit_doctor(doctor_id):
         flash('Doctor updated successfully!', 'success')
         return redirect(url_for('admin_doctors'))
     
-    departments = Department.query.all()
+    departments = cached_departments()
     return render_template('admin/edit_doctor.html', doctor=doctor, departments=departments)
 
 @app.route('/admin/doctor/delete/<int:doctor_id>', methods=['POST'])
@@ -285,21 +699,28 @@ def admin_delete_doctor(doctor_id):
     return redirect(url_for('admin_doctors'))
 
 @app.route('/admin/patients')
+@replica_reads
+@query_budget(5)
 @login_required
 @role_required('admin')
 def admin_patients():
     search_query = request.args.get('search', '')
     
-    if search_query:
-        patients = Patient.query.filter(
+    matches = search_matches(db.engine, 'patients', search_query) if search_query else None
+    if matches is not None:
+        query = Patient.query.join(matches, matches.c.id == Patient.id)
+    elif search_query:
+        query = Patient.query.filter(
             db.or_(
                 Patient.name.ilike(f'%{search_query}%'),
                 Patient.phone.ilike(f'%{search_query}%')
             )
-        ).all()
+        )
     else:
-        patients = Patient.query.all()
+        query = Patient.query
     
+    query = eager(query, 'user')
+    patients = keyset_paginate(query, [Patient.name, Patient.id], **page_args())
     return render_template('admin/patients.html', patients=patients, search_query=search_query)
 
 @app.route('/admin/patient/edit/<int:patient_id>', methods=['GET', 'POST'])
@@ -346,47 +767,80 @@ def admin_delete_patient(patient_id):
     return redirect(url_for('admin_patients'))
 
 @app.route('/admin/appointments')
+@replica_reads
+@query_budget(5)
 @login_required
 @role_required('admin')
 def admin_appointments():
-    appointments = Appointment.query.order_by(Appointment.appointment_date.desc()).all()
-    return render_template('admin/appointments.html', appointments=appointments)
+    status = request.args.get('status', '')
+    
+    query = eager(Appointment.query, 'patient', 'doctor.department')
+    if status:
+        query = query.filter_by(status=status)
+    
+    appointments = keyset_paginate(query, [Appointment.appointment_date, Appointment.id],
+                                   descending=True, **page_args())
+    return render_template('admin/appointments.html', appointments=appointments, status=status)
+
+@app.route('/admin/appointments/export')
+@replica_reads
+@login_required
+@role_required('admin')
+def admin_export_appointments():
+    fmt = request.args.get('format', 'csv')
+    status = request.args.get('status') or None
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format.', 'danger')
+        return redirect(url_for('admin_appointments'))
+    if fmt not in EXPORT_FORMATS:
+        flash('Unsupported export format.', 'danger')
+        return redirect(url_for('admin_appointments'))
+    
+    chunks = export_appointments(db.session, fmt, start, end, status, chunk_size=app.config['EXPORT_CHUNK_SIZE'])
+    response = app.response_class(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=appointments.{fmt}'
+    return response
 
 @app.route('/doctor/dashboard')
+@replica_reads
 @login_required
 @role_required('doctor')
 def doctor_dashboard():
-    doctor = Doctor.query.filter_by(user_id=current_user.id).first()
+    doctor_id = current_user.doctor_id
     
     today = date.today()
     week_end = today + timedelta(days=7)
     
-    upcoming_appointments = Appointment.query.filter(
-        Appointment.doctor_id == doctor.id,
+    upcoming_appointments = eager(Appointment.query, 'patient').filter(
+        Appointment.doctor_id == doctor_id,
         Appointment.appointment_date >= today,
         Appointment.appointment_date <= week_end,
         Appointment.status == 'Booked'
     ).order_by(Appointment.appointment_date, Appointment.appointment_time).all()
     
-    today_appointments = Appointment.query.filter(
-        Appointment.doctor_id == doctor.id,
+    today_appointments = eager(Appointment.query, 'patient').filter(
+        Appointment.doctor_id == doctor_id,
         Appointment.appointment_date == today
     ).all()
     
-    patients = Patient.query.join(Appointment).filter(Appointment.doctor_id == doctor.id).distinct().all()
+    patients = Patient.query.join(Appointment).filter(Appointment.doctor_id == doctor_id).distinct().all()
     
     return render_template('doctor/dashboard.html',
-                         doctor=doctor,
                          upcoming_appointments=upcoming_appointments,
                          today_appointments=today_appointments,
                          patients=patients)
 
 @app.route('/doctor/appointments')
+@replica_reads
+@query_budget(5)
 @login_required
 @role_required('doctor')
 def doctor_appointments():
-    doctor = Doctor.query.filter_by(user_id=current_user.id).first()
-    appointments = Appointment.query.filter_by(doctor_id=doctor.id).order_by(Appointment.appointment_date.desc()).all()
+    doctor_id = current_user.doctor_id
+    appointments = eager(Appointment.query, 'patient').filter_by(doctor_id=doctor_id).order_by(Appointment.appointment_date.desc()).all()
     return render_template('doctor/appointments.html', appointments=appointments)
 
 @app.route('/doctor/appointment/<int:appointment_id>/complete', methods=['GET', 'POST'])
@@ -394,9 +848,9 @@ def doctor_appointments():
 @role_required('doctor')
 def doctor_complete_appointment(appointment_id):
     appointment = Appointment.query.get_or_404(appointment_id)
-    doctor = Doctor.query.filter_by(user_id=current_user.id).first()
+    doctor_id = current_user.doctor_id
     
-    if appointment.doctor_id != doctor.id:
+    if appointment.doctor_id != doctor_id:
         flash('Unauthorized access.', 'danger')
         return redirect(url_for('doctor_appointments'))
     
@@ -417,6 +871,7 @@ def doctor_complete_appointment(appointment_id):
         )
         db.session.add(treatment)
         db.session.commit()
+        metrics.inc('hms_completions_total')
         
         flash('Appointment completed and treatment recorded!', 'success')
         return redirect(url_for('doctor_appointments'))
@@ -424,15 +879,17 @@ def doctor_complete_appointment(appointment_id):
     return render_template('doctor/complete_appointment.html', appointment=appointment)
 
 @app.route('/doctor/patient/<int:patient_id>/history')
+@replica_reads
+@query_budget(5)
 @login_required
 @role_required('doctor')
 def doctor_patient_history(patient_id):
     patient = Patient.query.get_or_404(patient_id)
-    doctor = Doctor.query.filter_by(user_id=current_user.id).first()
+    doctor_id = current_user.doctor_id
     
-    appointments = Appointment.query.filter_by(
+    appointments = eager(Appointment.query, 'treatment').filter_by(
         patient_id=patient_id,
-        doctor_id=doctor.id,
+        doctor_id=doctor_id,
         status='Completed'
     ).order_by(Appointment.appointment_date.desc()).all()
     
@@ -442,81 +899,101 @@ def doctor_patient_history(patient_id):
 @login_required
 @role_required('doctor')
 def doctor_availability():
-    doctor = Doctor.query.filter_by(user_id=current_user.id).first()
+    doctor_id = current_user.doctor_id
+    
+    days = availability_days()
+    weekly = {row.weekday: row for row in WeeklyAvailability.query.filter_by(doctor_id=doctor_id)}
     
     if request.method == 'POST':
-        today = date.today()
-        week_end = today + timedelta(days=7)
-        DoctorAvailability.query.filter(
-            DoctorAvailability.doctor_id == doctor.id,
-            DoctorAvailability.date >= today,
-            DoctorAvailability.date <= week_end
-        ).delete()
-        
-        for i in range(7):
-            date_key = (today + timedelta(days=i)).strftime('%Y-%m-%d')
+        # Only days that differ from the weekly template are stored as overrides
+        overrides = {}
+        for day in days:
+            date_key = day.strftime('%Y-%m-%d')
             is_available = request.form.get(f'available_{date_key}')
+            template = weekly.get(day.weekday())
+            default = (template.start_time, template.end_time) if template else None
             
             if is_available:
                 start_time = request.form.get(f'start_time_{date_key}')
                 end_time = request.form.get(f'end_time_{date_key}')
-                
-                availability = DoctorAvailability(
-                    doctor_id=doctor.id,
-                    date=(today + timedelta(days=i)),
-                    start_time=start_time,
-                    end_time=end_time,
-                    is_available=True
-                )
-                db.session.add(availability)
+                if (start_time, end_time) != default:
+                    overrides[day] = (start_time, end_time, True)
+            elif default:
+                overrides[day] = (default[0], default[1], False)
         
+        upserted, deleted = save_availability(db.session, doctor_id, days, overrides)
+        if upserted or deleted:
+            refresh_slots(days[0], days[-1], doctor_ids=[doctor_id])
         db.session.commit()
-        flash('Availability updated successfully!', 'success')
+        if upserted or deleted:
+            flash('Availability updated successfully!', 'success')
+        else:
+            flash('No changes to availability.', 'info')
         return redirect(url_for('doctor_dashboard'))
     
-    today = date.today()
+    openings = {o.date: o for o in expand_availability(days[0], days[-1], [doctor_id])}
     availability_dict = {}
     dates_list = []
-    for i in range(7):
-        current_date = today + timedelta(days=i)
-        avail = DoctorAvailability.query.filter_by(
-            doctor_id=doctor.id,
-            date=current_date
-        ).first()
+    for current_date in days:
         date_str = current_date.strftime('%Y-%m-%d')
-        availability_dict[date_str] = avail
+        availability_dict[date_str] = openings.get(current_date)
         dates_list.append({
             'date': current_date,
             'date_str': date_str,
             'day_name': current_date.strftime('%A, %B %d, %Y')
         })
     
-    return render_template('doctor/availability.html', availability=availability_dict, dates=dates_list)
+    weekdays = [{'weekday': i, 'name': name, 'hours': weekly.get(i)}
+                for i, name in enumerate(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])]
+    
+    return render_template('doctor/availability.html', availability=availability_dict, dates=dates_list, weekdays=weekdays)
+
+@app.route('/doctor/availability/weekly', methods=['POST'])
+@login_required
+@role_required('doctor')
+def doctor_weekly_availability():
+    doctor_id = current_user.doctor_id
+    
+    hours = {}
+    for weekday in range(7):
+        if request.form.get(f'weekly_available_{weekday}'):
+            hours[weekday] = (request.form.get(f'weekly_start_time_{weekday}'),
+                              request.form.get(f'weekly_end_time_{weekday}'))
+    
+    upserted, deleted = save_weekly_template(db.session, doctor_id, hours)
+    if upserted or deleted:
+        days = availability_days()
+        refresh_slots(days[0], days[-1], doctor_ids=[doctor_id])
+    db.session.commit()
+    if upserted or deleted:
+        flash('Weekly schedule updated successfully!', 'success')
+    else:
+        flash('No changes to weekly schedule.', 'info')
+    return redirect(url_for('doctor_availability'))
 
 @app.route('/patient/dashboard')
+@replica_reads
 @login_required
 @role_required('patient')
 def patient_dashboard():
-    patient = Patient.query.filter_by(user_id=current_user.id).first()
+    patient_id = current_user.patient_id
     
-    departments = Department.query.all()
+    departments = department_stats()
     
     today = date.today()
-    upcoming_appointments = Appointment.query.filter(
-        Appointment.patient_id == patient.id,
+    upcoming_appointments = eager(Appointment.query, 'doctor.department').filter(
+        Appointment.patient_id == patient_id,
         Appointment.appointment_date >= today,
         Appointment.status == 'Booked'
     ).order_by(Appointment.appointment_date).all()
     
     week_end = today + timedelta(days=7)
-    available_doctors = Doctor.query.join(DoctorAvailability).filter(
-        DoctorAvailability.date >= today,
-        DoctorAvailability.date <= week_end,
-        DoctorAvailability.is_available == True
-    ).distinct().all()
+    available_ids = {o.doctor_id for o in expand_availability(today, week_end)}
+    available_doctors = eager(Doctor.query, 'department').filter(
+        Doctor.id.in_(available_ids)
+    ).order_by(Doctor.id).all()
     
     return render_template('patient/dashboard.html',
-                         patient=patient,
                          departments=departments,
                          upcoming_appointments=upcoming_appointments,
                          available_doctors=available_doctors)
@@ -525,7 +1002,7 @@ def patient_dashboard():
 @login_required
 @role_required('patient')
 def patient_profile():
-    patient = Patient.query.filter_by(user_id=current_user.id).first()
+    patient = Patient.query.get(current_user.patient_id)
     
     if request.method == 'POST':
         patient.name = request.form.get('name')
@@ -540,33 +1017,41 @@ def patient_profile():
             patient.date_of_birth = datetime.strptime(dob, '%Y-%m-%d').date()
         
         db.session.commit()
+        forget_identity(session)
         flash('Profile updated successfully!', 'success')
         return redirect(url_for('patient_dashboard'))
     
     return render_template('patient/profile.html', patient=patient)
 
 @app.route('/patient/doctors')
+@replica_reads
 @login_required
 @role_required('patient')
 def patient_doctors():
     search_query = request.args.get('search', '')
     department_id = request.args.get('department')
     
-    query = Doctor.query.join(Department)
-    
-    if search_query:
-        query = query.filter(
-            db.or_(
-                Doctor.name.ilike(f'%{search_query}%'),
-                Department.name.ilike(f'%{search_query}%')
+    if not search_query:
+        doctors = cached_doctors(request.args.get('department', type=int))
+    else:
+        query = eager(Doctor.query, 'department').join(Department)
+        
+        matches = search_matches(db.engine, 'doctors', search_query)
+        if matches is not None:
+            query = query.join(matches, matches.c.id == Doctor.id).order_by(matches.c.rank)
+        else:
+            query = query.filter(
+                db.or_(
+                    Doctor.name.ilike(f'%{search_query}%'),
+                    Department.name.ilike(f'%{search_query}%')
+                )
             )
-        )
-    
-    if department_id:
-        query = query.filter(Doctor.department_id == department_id)
-    
-    doctors = query.all()
-    departments = Department.query.all()
+        
+        if department_id:
+            query = query.filter(Doctor.department_id == department_id)
+        
+        doctors = query.all()
+    departments = department_stats()
     
     return render_template('patient/doctors.html',
                          doctors=doctors,
@@ -579,53 +1064,137 @@ def patient_doctors():
 @role_required('patient')
 def patient_book_appointment(doctor_id):
     doctor = Doctor.query.get_or_404(doctor_id)
-    patient = Patient.query.filter_by(user_id=current_user.id).first()
+    patient_id = current_user.patient_id
     
     if request.method == 'POST':
         appointment_date = request.form.get('appointment_date')
         appointment_time = request.form.get('appointment_time')
         reason = request.form.get('reason')
         
-        existing = Appointment.query.filter_by(
-            doctor_id=doctor_id,
-            appointment_date=datetime.strptime(appointment_date, '%Y-%m-%d').date(),
-            appointment_time=appointment_time
-        ).first()
+        try:
+            appointment_date = datetime.strptime(appointment_date or '', '%Y-%m-%d').date()
+        except ValueError:
+            appointment_date = None
+        
+        # '9:00' and '09:00:00' name the same slot as '09:00'; only the canonical
+        # form is checked and stored, so the unique slot key sees one value.
+        slot_minutes = app.config['SLOT_MINUTES']
+        appointment_time = canonical_time(appointment_time)
+        now = datetime.now()
+        upcoming = appointment_date is not None and appointment_time is not None and (
+            appointment_date > now.date()
+            or (appointment_date == now.date() and parse_time(appointment_time) >= now.hour * 60 + now.minute)
+        )
         
-        if existing:
-            flash('This time slot is already booked. Please choose another time.', 'danger')
+        # The window check works on the availability row alone; appointments are
+        # only touched once the requested time is known to be a real slot.
+        avail = None
+        if upcoming:
+            openings = expand_availability(appointment_date, appointment_date, [doctor_id])
+            avail = openings[0] if openings else None
+        if not avail or not is_open(avail.start_time, avail.end_time, appointment_time, slot_minutes):
+            flash('Please choose one of the available time slots.', 'danger')
             return redirect(url_for('patient_book_appointment', doctor_id=doctor_id))
         
-        appointment = Appointment(
-            patient_id=patient.id,
-            doctor_id=doctor_id,
-            appointment_date=datetime.strptime(appointment_date, '%Y-%m-%d').date(),
-            appointment_time=appointment_time,
-            reason=reason,
-            status='Booked'
-        )
-        db.session.add(appointment)
+        try:
+            booked = book_slot(db.session, patient_id, doctor_id, appointment_date, appointment_time, reason)
+        except OperationalError:
+            flash('The booking system is busy right now. Please try again in a moment.', 'warning')
+            return redirect(url_for('patient_book_appointment', doctor_id=doctor_id))
+        
+        if not booked:
+            suggestion = next_free_slot(db.session, avail, appointment_time, slot_minutes)
+            if suggestion:
+                flash(f'This time slot is already booked. The next free slot that day is {suggestion}.', 'danger')
+            else:
+                flash('This time slot is already booked and no other slots are free that day.', 'danger')
+            return redirect(url_for('patient_book_appointment', doctor_id=doctor_id))
+        
+        refresh_slots(appointment_date, doctor_ids=[doctor_id])
         db.session.commit()
+        metrics.inc('hms_bookings_total')
         
         flash('Appointment booked successfully!', 'success')
         return redirect(url_for('patient_appointments'))
     
-    today = date.today()
-    availability = DoctorAvailability.query.filter(
-        DoctorAvailability.doctor_id == doctor_id,
-        DoctorAvailability.date >= today,
-        DoctorAvailability.date <= today + timedelta(days=7),
-        DoctorAvailability.is_available == True
-    ).all()
+    days = availability_days()
+    availability = expand_availability(days[0], days[-1], [doctor_id])
     
-    return render_template('patient/book_appointment.html', doctor=doctor, availability=availability)
+    taken = {}
+    for booked_date, booked_time in db.session.query(Appointment.appointment_date, Appointment.appointment_time).filter(
+        Appointment.doctor_id == doctor_id,
+        Appointment.appointment_date >= days[0],
+        Appointment.appointment_date <= days[-1],
+        Appointment.status != 'Cancelled'
+    ):
+        taken.setdefault(booked_date, []).append(booked_time)
+    
+    slots = free_slots(availability, taken, app.config['SLOT_MINUTES'])
+    now = datetime.now()
+    if now.date() in slots:
+        # Canonical 'HH:MM' strings sort by time, so earlier slots today drop out
+        slots[now.date()] = [t for t in slots[now.date()] if t >= now.strftime('%H:%M')]
+        if not slots[now.date()]:
+            del slots[now.date()]
+    availability = [a for a in availability if a.date in slots]
+    slots = {d.strftime('%Y-%m-%d'): times for d, times in slots.items()}
+    
+    return render_template('patient/book_appointment.html', doctor=doctor, availability=availability, slots=slots)
+
+def find_earliest_slots(department_id):
+    days = availability_days()
+    try:
+        start = max(datetime.strptime(request.args['start'], '%Y-%m-%d').date(), days[0])
+    except (KeyError, ValueError):
+        start = days[0]
+    try:
+        end = min(datetime.strptime(request.args['end'], '%Y-%m-%d').date(), days[-1])
+    except (KeyError, ValueError):
+        end = days[-1]
+    limit = max(1, min(request.args.get('limit', 10, type=int), app.config['MAX_PAGE_SIZE']))
+    
+    # Days entering the horizon are indexed on the primary, where the horizon and
+    # the bookings are current; the search itself stays on the replica unless
+    # this request just wrote rows the replica does not have yet
+    use_replica = g.get('db_replica')
+    g.db_replica = False
+    if extend_slot_index(db.session, days[-1], app.config['SLOT_MINUTES']):
+        db.session.commit()
+    else:
+        g.db_replica = use_replica
+    
+    now = datetime.now()
+    results = earliest_slots(db.session, department_id, start, end, app.config['SLOT_MINUTES'],
+                             limit=limit, not_before=(now.date(), now.hour * 60 + now.minute))
+    return start, end, results
+
+@app.route('/patient/earliest-slots')
+@replica_reads
+@login_required
+@role_required('patient')
+def patient_earliest_slots():
+    departments = cached_departments()
+    department_id = request.args.get('department', type=int)
+    
+    start, end, results = find_earliest_slots(department_id) if department_id else (None, None, [])
+    doctors = {d.id: d for d in Doctor.query.filter(Doctor.id.in_({r[2] for r in results}))}
+    slots = [{'date': day, 'time': time, 'doctor': doctors[doctor_id]} for day, time, doctor_id in results]
+    
+    return render_template('patient/earliest_slots.html',
+                         departments=departments,
+                         selected_department=department_id,
+                         start=start,
+                         end=end,
+                         slots=slots)
 
 @app.route('/patient/appointments')
+@replica_reads
+@query_budget(5)
 @login_required
 @role_required('patient')
 def patient_appointments():
-    patient = Patient.query.filter_by(user_id=current_user.id).first()
-    appointments = Appointment.query.filter_by(patient_id=patient.id).order_by(Appointment.appointment_date.desc()).all()
+    patient_id = current_user.patient_id
+    appointments = eager(Appointment.query, 'doctor.department').filter_by(patient_id=patient_id).order_by(Appointment.appointment_date.desc()).all()
     return render_template('patient/appointments.html', appointments=appointments)
 
 @app.route('/patient/appointment/<int:appointment_id>/cancel', methods=['POST'])
@@ -633,9 +1202,9 @@ def patient_appointments():
 @role_required('patient')
 def patient_cancel_appointment(appointment_id):
     appointment = Appointment.query.get_or_404(appointment_id)
-    patient = Patient.query.filter_by(user_id=current_user.id).first()
+    patient_id = current_user.patient_id
     
-    if appointment.patient_id != patient.id:
+    if appointment.patient_id != patient_id:
         flash('Unauthorized access.', 'danger')
         return redirect(url_for('patient_appointments'))
     
@@ -644,67 +1213,126 @@ def patient_cancel_appointment(appointment_id):
         return redirect(url_for('patient_appointments'))
     
     appointment.status = 'Cancelled'
+    refresh_slots(appointment.appointment_date, doctor_ids=[appointment.doctor_id])
     db.session.commit()
+    metrics.inc('hms_cancellations_total')
     
     flash('Appointment cancelled successfully!', 'success')
     return redirect(url_for('patient_appointments'))
 
 @app.route('/patient/history')
+@replica_reads
+@query_budget(5)
 @login_required
 @role_required('patient')
 def patient_history():
-    patient = Patient.query.filter_by(user_id=current_user.id).first()
+    patient_id = current_user.patient_id
     
-    completed_appointments = Appointment.query.filter_by(
-        patient_id=patient.id,
+    completed_appointments = eager(Appointment.query, 'doctor.department', 'treatment').filter_by(
+        patient_id=patient_id,
         status='Completed'
     ).order_by(Appointment.appointment_date.desc()).all()
     
     return render_template('patient/history.html', appointments=completed_appointments)
 
 @app.route('/api/departments', methods=['GET'])
+@replica_reads
 def api_get_departments():
-    departments = Department.query.all()
+    etag = f'departments-v{catalog_version()}-{schedule_version()}-{date.today():%Y%m%d}'
+    return conditional_json(etag, department_stats)
+
+@app.route('/api/departments/<int:department_id>/earliest-slots', methods=['GET'])
+@replica_reads
+def api_earliest_slots(department_id):
+    start, end, results = find_earliest_slots(department_id)
     return jsonify([{
-        'id': d.id,
-        'name': d.name,
-        'description': d.description,
-        'doctor_count': len(d.doctors)
-    } for d in departments])
+        'date': day.strftime('%Y-%m-%d'),
+        'time': time,
+        'doctor_id': doctor_id
+    } for day, time, doctor_id in results])
 
 @app.route('/api/doctors', methods=['GET'])
+@replica_reads
 def api_get_doctors():
-    department_id = request.args.get('department_id')
+    department_id = request.args.get('department_id', type=int)
     
-    query = Doctor.query
-    if department_id:
-        query = query.filter_by(department_id=department_id)
+    def build():
+        return [{
+            'id': d.id,
+            'name': d.name,
+            'department': d.department.name,
+            'qualification': d.qualification,
+            'experience_years': d.experience_years,
+            'consultation_fee': d.consultation_fee
+        } for d in cached_doctors(department_id)]
     
-    doctors = query.all()
-    return jsonify([{
-        'id': d.id,
-        'name': d.name,
-        'department': d.department.name,
-        'qualification': d.qualification,
-        'experience_years': d.experience_years,
-        'consultation_fee': d.consultation_fee
-    } for d in doctors])
+    return conditional_json(f'doctors-v{catalog_version()}-{department_id or "all"}', build)
 
 @app.route('/api/doctor/<int:doctor_id>/availability', methods=['GET'])
+@replica_reads
 def api_doctor_availability(doctor_id):
-    today = date.today()
-    availability = DoctorAvailability.query.filter(
-        DoctorAvailability.doctor_id == doctor_id,
-        DoctorAvailability.date >= today,
-        DoctorAvailability.date <= today + timedelta(days=7),
-        DoctorAvailability.is_available == True
-    ).all()
+    days = availability_days()
     
-    return jsonify([{
-        'date': a.date.strftime('%Y-%m-%d'),
-        'start_time': a.start_time,
-        'end_time': a.end_time
-    } for a in availability])
+    def build():
+        return [{
+            'date': a.date.strftime('%Y-%m-%d'),
+            'start_time': a.start_time,
+            'end_time': a.end_time
+        } for a in expand_availability(days[0], days[-1], [doctor_id])]
+    
+    # The horizon rolls daily, so its bounds are part of the tag
+    version = read_availability_version(db.session, doctor_id)
+    return conditional_json(f'availability-{doctor_id}-v{version}-{days[0]:%Y%m%d}-{len(days)}', build)
+
+@app.route('/api/v2/doctors', methods=['GET'])
+@replica_reads
+def api_v2_doctors():
+    query = Doctor.query
+    department_id = request.args.get('department_id', type=int)
+    if department_id:
+        query = query.filter(Doctor.department_id == department_id)
+    return stream_page(query, DOCTOR_FIELDS, [Doctor.id])
+
+@app.route('/api/v2/appointments', methods=['GET'])
+@app.route('/api/v2/doctors/<int:doctor_id>/appointments', methods=['GET'])
+@app.route('/api/v2/patients/<int:patient_id>/appointments', methods=['GET'])
+@replica_reads
+def api_v2_appointments(doctor_id=None, patient_id=None):
+    if not current_user.is_authenticated:
+        return api_error('Authentication required.', 401)
+    
+    doctor_id = doctor_id or request.args.get('doctor_id', type=int)
+    patient_id = patient_id or request.args.get('patient_id', type=int)
+    
+    # Doctors and patients only ever see their own appointments
+    if current_user.role == 'doctor':
+        if doctor_id not in (None, current_user.doctor_id):
+            return api_error('You do not have permission to view these appointments.', 403)
+        doctor_id = current_user.doctor_id
+    elif current_user.role == 'patient':
+        if patient_id not in (None, current_user.patient_id):
+            return api_error('You do not have permission to view these appointments.', 403)
+        patient_id = current_user.patient_id
+    
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+    except ValueError:
+        return api_error('Dates must be in YYYY-MM-DD format.', 400)
+    
+    query = Appointment.query
+    if doctor_id:
+        query = query.filter(Appointment.doctor_id == doctor_id)
+    if patient_id:
+        query = query.filter(Appointment.patient_id == patient_id)
+    if start:
+        query = query.filter(Appointment.appointment_date >= start)
+    if end:
+        query = query.filter(Appointment.appointment_date <= end)
+    if request.args.get('status'):
+        query = query.filter(Appointment.status == request.args['status'])
+    
+    return stream_page(query, APPOINTMENT_FIELDS, [Appointment.appointment_date, Appointment.id])
 
 if __name__ == '__main__':
     init_db()
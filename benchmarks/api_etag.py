@@ -0,0 +1,82 @@
+"""Bytes and CPU per poll of the JSON API, with and without If-None-Match.
+
+Seeds a throwaway SQLite database, then polls each endpoint ``--polls`` times
+as a client that ignores ETags and again as one that revalidates with the tag
+from its previous response.
+
+    python benchmarks/api_etag.py --doctors 500 --polls 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def seed(db, models, doctors):
+    users = [{'email': f'bench-doctor-{i}@hospital.com', 'password': 'x', 'role': 'doctor', 'is_active': True}
+             for i in range(doctors)]
+    db.session.execute(models.User.__table__.insert(), users)
+    user_ids = [u for (u,) in db.session.query(models.User.id).filter(models.User.role == 'doctor')]
+    db.session.execute(models.Doctor.__table__.insert(), [{
+        'user_id': user_id,
+        'department_id': 1 + i % 6,
+        'name': f'Dr. Bench {i}',
+        'qualification': 'MBBS, MD',
+        'experience_years': i % 30,
+        'consultation_fee': 500.0
+    } for i, user_id in enumerate(user_ids)])
+    first_doctor = db.session.query(models.Doctor.id).order_by(models.Doctor.id).first()[0]
+    db.session.execute(models.WeeklyAvailability.__table__.insert(), [
+        {'doctor_id': first_doctor, 'weekday': weekday, 'start_time': '09:00', 'end_time': '17:00'}
+        for weekday in range(7)
+    ])
+    db.session.commit()
+    return first_doctor
+
+
+def poll(client, url, polls, conditional):
+    etag = None
+    total_bytes = 0
+    cpu_start = time.process_time()
+    for _ in range(polls):
+        headers = {'If-None-Match': etag} if conditional and etag else {}
+        response = client.get(url, headers=headers)
+        assert response.status_code in (200, 304), response.status_code
+        etag = response.headers.get('ETag') or etag
+        total_bytes += len(response.get_data())
+    cpu = time.process_time() - cpu_start
+    return total_bytes / polls, cpu / polls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--doctors', type=int, default=500)
+    parser.add_argument('--polls', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='hms-etag-')
+    os.environ['HMS_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'etag.db')}"
+
+    import models
+    from app import app, init_db
+    from models import db
+
+    init_db()
+    with app.app_context():
+        doctor_id = seed(db, models, args.doctors)
+
+    client = app.test_client()
+    urls = ['/api/departments', '/api/doctors', f'/api/doctor/{doctor_id}/availability']
+    print(f"{'endpoint':<32}{'mode':<14}{'bytes/poll':>12}{'cpu ms/poll':>14}")
+    for url in urls:
+        for conditional in (False, True):
+            size, cpu = poll(client, url, args.polls, conditional)
+            mode = 'If-None-Match' if conditional else 'full'
+            print(f'{url:<32}{mode:<14}{size:>12.0f}{cpu:>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Concurrent booking stress run against a throwaway SQLite database.
+
+Fires ``--bookings`` POSTs at one doctor's booking page from ``--threads``
+threads, all aiming at a small pool of slots, then checks that no slot holds
+more than one Booked appointment and that no request returned a 5xx.
+
+    python benchmarks/booking_stress.py --bookings 2000 --threads 32
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--patients', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='hms-stress-')
+    os.environ['HMS_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+
+    from werkzeug.security import generate_password_hash
+    from app import app, init_db
+    from models import db, User, Doctor, Patient, Appointment, DoctorAvailability
+
+    init_db()
+    day = date.today() + timedelta(days=1)
+    with app.app_context():
+        password = generate_password_hash('stress', method='pbkdf2:sha256:1000')
+        user = User(email='stress-doctor@hospital.com', password=password, role='doctor')
+        db.session.add(user)
+        db.session.flush()
+        doctor = Doctor(user_id=user.id, department_id=1, name='Dr. Stress')
+        db.session.add(doctor)
+        db.session.flush()
+        db.session.add(DoctorAvailability(doctor_id=doctor.id, date=day, start_time='09:00', end_time='12:00'))
+        patient_users = []
+        for i in range(args.patients):
+            user = User(email=f'stress-patient-{i}@hospital.com', password=password, role='patient')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Patient(user_id=user.id, name=f'Stress Patient {i}'))
+            patient_users.append(user.id)
+        db.session.commit()
+        doctor_id = doctor.id
+
+    slot_minutes = app.config['SLOT_MINUTES']
+    slots = [f'{9 + m // 60:02d}:{m % 60:02d}' for m in range(0, 180, slot_minutes)]
+    local = threading.local()
+
+    def client():
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            with local.client.session_transaction() as session:
+                session['_user_id'] = str(random.choice(patient_users))
+                session['_fresh'] = True
+        return local.client
+
+    def book(_):
+        response = client().post(f'/patient/book-appointment/{doctor_id}', data={
+            'appointment_date': day.strftime('%Y-%m-%d'),
+            'appointment_time': random.choice(slots),
+            'reason': 'stress'
+        })
+        if response.status_code >= 500:
+            return '5xx'
+        if response.headers.get('Location', '').endswith('/patient/appointments'):
+            return 'booked'
+        return 'rejected'
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        outcomes = Counter(pool.map(book, range(args.bookings)))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        doubles = db.session.query(
+            Appointment.appointment_time, db.func.count()
+        ).filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.status == 'Booked'
+        ).group_by(Appointment.appointment_time).having(db.func.count() > 1).all()
+        booked_rows = Appointment.query.filter_by(doctor_id=doctor_id, status='Booked').count()
+
+    print(f'{args.bookings} requests on {len(slots)} slots with {args.threads} threads in {elapsed:.2f}s '
+          f'({args.bookings / elapsed:.0f} req/s)')
+    print(f"booked={outcomes['booked']} rejected={outcomes['rejected']} 5xx={outcomes['5xx']}")
+    print(f'booked rows={booked_rows} double-booked slots={len(doubles)}')
+
+    ok = not doubles and not outcomes['5xx'] and outcomes['booked'] == booked_rows
+    print('OK' if ok else 'FAILED')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""Multi-user load harness: patients, doctors and admins against a real HTTP server.
+
+Seeds a throwaway database and starts the app in a server subprocess, either
+werkzeug's threaded server or a forking one. It then ramps through
+``--stages`` of concurrent virtual users split by ``--mix``. Each virtual
+user logs in once and loops over its role's scenario:
+
+- patient: dashboard, find the earliest free slot, book it, list
+  appointments, sometimes cancel one
+- doctor: dashboard, appointment list, complete a past booking, availability
+- admin: dashboard, doctor/patient search, appointment listing, department API
+
+For each stage it reports throughput, p50/p95/p99 and the error rate per
+step. Lock errors are counted both client-side (5xx, the booking page's
+"busy" message) and server-side. With the threaded server it also reports
+database contention: SQL time, the peak number of pooled connections in use,
+and errors raised by SQLite as "database is locked".
+Everything runs on this machine.
+
+    python benchmarks/load_harness.py --stages 1,4,16 --stage-seconds 20
+    python benchmarks/load_harness.py --server processes --workers 4 --mix patient=8,doctor=2,admin=0
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def serve(args):
+    """Server subprocess: the app plus a stats endpoint for contention counters."""
+    from flask import jsonify
+    from sqlalchemy import event
+    from werkzeug.serving import run_simple
+    from app import app
+    from models import db
+
+    stats = {'sql_seconds': 0.0, 'statements': 0, 'lock_errors': 0, 'pool_peak': 0}
+    lock = threading.Lock()
+    local = threading.local()
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before(conn, cursor, statement, parameters, context, executemany):
+        local.started = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - local.started
+        with lock:
+            stats['sql_seconds'] += elapsed
+            stats['statements'] += 1
+            stats['pool_peak'] = max(stats['pool_peak'], engine.pool.checkedout())
+
+    @event.listens_for(engine, 'handle_error')
+    def on_error(context):
+        message = str(context.original_exception).lower()
+        if 'locked' in message or 'busy' in message:
+            with lock:
+                stats['lock_errors'] += 1
+
+    def read_stats():
+        with lock:
+            snapshot = dict(stats)
+            stats.update(sql_seconds=0.0, statements=0, lock_errors=0, pool_peak=0)
+        return jsonify(snapshot)
+
+    app.add_url_rule('/__load/stats', 'load_stats', read_stats)
+    threaded = args.server == 'threaded'
+    run_simple('127.0.0.1', args.port, app, threaded=threaded, processes=1 if threaded else args.workers)
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock_errors = 0
+        self.lock = threading.Lock()
+
+    def add(self, step, seconds, ok):
+        with self.lock:
+            self.latencies[step].append(seconds)
+            if not ok:
+                self.errors[step] += 1
+
+    def busy(self):
+        with self.lock:
+            self.lock_errors += 1
+
+
+class VirtualUser:
+    def __init__(self, base, recorder, email, password):
+        self.base = base
+        self.recorder = recorder
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), NoRedirect)
+        self.email = email
+        self.password = password
+
+    def request(self, step, path, data=None):
+        """Returns ``(status, body, location)``; 3xx counts as success."""
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        started = time.perf_counter()
+        try:
+            response = self.opener.open(self.base + path, body, timeout=60)
+            status, payload, location = response.status, response.read(), response.headers.get('Location')
+        except urllib.error.HTTPError as e:
+            status, payload, location = e.code, e.read(), e.headers.get('Location')
+        except (urllib.error.URLError, socket.timeout):
+            status, payload, location = 599, b'', None
+        self.recorder.add(step, time.perf_counter() - started, status < 400)
+        if status >= 500 and b'locked' in payload.lower():
+            self.recorder.busy()
+        return status, payload, location or ''
+
+    def json(self, step, path):
+        status, payload, _ = self.request(step, path)
+        return json.loads(payload) if status == 200 else None
+
+    def login(self, role):
+        return self.request(f'{role}: login', '/login', {'email': self.email, 'password': self.password})
+
+
+def patient_loop(user, departments, stop):
+    user.login('patient')
+    while not stop.is_set():
+        user.request('patient: dashboard', '/patient/dashboard')
+        slots = user.json('patient: earliest slots',
+                          f'/api/departments/{random.choice(departments)}/earliest-slots?limit=5') or []
+        if slots:
+            slot = random.choice(slots)
+            status, _, location = user.request('patient: book', f"/patient/book-appointment/{slot['doctor_id']}", {
+                'appointment_date': slot['date'], 'appointment_time': slot['time'], 'reason': 'Load test'})
+            if status == 302 and '/book-appointment/' in location:
+                _, page, _ = user.request('patient: book page', location)
+                if b'busy right now' in page:
+                    user.recorder.busy()
+        user.request('patient: appointments', '/patient/appointments')
+        if random.random() < 0.2:
+            booked = user.json('patient: v2 appointments',
+                               '/api/v2/appointments?status=Booked&fields=id&limit=20') or {'items': []}
+            if booked['items']:
+                appointment = random.choice(booked['items'])['id']
+                user.request('patient: cancel', f'/patient/appointment/{appointment}/cancel', {})
+
+
+def doctor_loop(user, departments, stop):
+    user.login('doctor')
+    while not stop.is_set():
+        user.request('doctor: dashboard', '/doctor/dashboard')
+        user.request('doctor: appointments', '/doctor/appointments')
+        due = user.json('doctor: v2 appointments',
+                        f'/api/v2/appointments?status=Booked&end={date.today()}&fields=id&limit=20') or {'items': []}
+        if due['items']:
+            appointment = random.choice(due['items'])['id']
+            user.request('doctor: complete form', f'/doctor/appointment/{appointment}/complete')
+            user.request('doctor: complete', f'/doctor/appointment/{appointment}/complete', {
+                'diagnosis': 'Load test', 'prescription': 'Rest', 'notes': ''})
+        user.request('doctor: availability', '/doctor/availability')
+
+
+def admin_loop(user, departments, stop):
+    user.login('admin')
+    terms = ['sha', 'dr', 'an', 'ra', 'me']
+    while not stop.is_set():
+        user.request('admin: dashboard', '/admin/dashboard')
+        user.request('admin: doctors', f'/admin/doctors?search={random.choice(terms)}')
+        user.request('admin: patients', f'/admin/patients?search={random.choice(terms)}')
+        user.request('admin: appointments', '/admin/appointments?status=Booked')
+        user.request('admin: departments api', '/api/departments')
+
+
+SCENARIOS = {'patient': patient_loop, 'doctor': doctor_loop, 'admin': admin_loop}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def wait_for(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server did not start on port {port}')
+
+
+def split(users, mix):
+    """Deal ``users`` virtual users out over roles in proportion to ``mix``."""
+    total = sum(mix.values())
+    roles = [role for role, weight in mix.items() for _ in range(weight)]
+    return [roles[i * total // users % total] if users < total else roles[i % total] for i in range(users)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=['threaded', 'processes'], default='threaded')
+    parser.add_argument('--workers', type=int, default=4, help='Server processes with --server processes.')
+    parser.add_argument('--stages', default='1,4,16', help='Concurrent virtual users per stage.')
+    parser.add_argument('--stage-seconds', type=float, default=20)
+    parser.add_argument('--mix', default='patient=6,doctor=3,admin=1')
+    parser.add_argument('--doctors', type=int, default=60)
+    parser.add_argument('--patients', type=int, default=2000)
+    parser.add_argument('--appointments', type=int, default=30000)
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--output', help='Also write the results as JSON here.')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    workdir = tempfile.mkdtemp(prefix='hms-load-')
+    os.environ['HMS_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    # Logins are not what this harness measures; keep hashing cheap
+    os.environ.setdefault('HMS_PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    password = 'load-test'
+
+    from app import app, init_db, password_hasher, refresh_slots, availability_days
+    from models import db, User, Department
+    from services import seed_synthetic
+
+    init_db()
+    with app.app_context():
+        seed_synthetic(db.engine, doctors=args.doctors, patients=args.patients, appointments=args.appointments,
+                       password_hash=password_hasher.hash(password),
+                       future_days=app.config['AVAILABILITY_DAYS'], slot_minutes=app.config['SLOT_MINUTES'])
+        days = availability_days()
+        refresh_slots(days[0], days[-1])
+        db.session.commit()
+        admin = User.query.filter_by(role='admin').first()
+        admin.password = password_hasher.hash(password)
+        db.session.commit()
+        accounts = {role: [u.email for u in User.query.filter_by(role=role, is_active=True)]
+                    for role in ('patient', 'doctor')}
+        accounts['admin'] = [admin.email]
+        departments = [d.id for d in Department.query]
+
+    if not args.port:
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            args.port = s.getsockname()[1]
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', '--port', str(args.port),
+                               '--server', args.server, '--workers', str(args.workers)],
+                              cwd=ROOT, env=dict(os.environ), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{args.port}'
+    mix = {role: int(weight) for role, weight in (part.split('=') for part in args.mix.split(',')) if int(weight)}
+    report = []
+    try:
+        wait_for(args.port)
+        for users in [int(n) for n in args.stages.split(',')]:
+            recorder = Recorder()
+            stop = threading.Event()
+            stats_client = VirtualUser(base, Recorder(), None, None)
+            stats_client.json('stats', '/__load/stats')  # reset the server counters
+            threads = []
+            for n, role in enumerate(split(users, mix)):
+                pool = accounts[role]
+                user = VirtualUser(base, recorder, pool[n % len(pool)], password)
+                threads.append(threading.Thread(target=SCENARIOS[role], args=(user, departments, stop), daemon=True))
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            time.sleep(args.stage_seconds)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            server_stats = stats_client.json('stats', '/__load/stats') if args.server == 'threaded' else None
+
+            requests = sum(len(v) for v in recorder.latencies.values())
+            errors = sum(recorder.errors.values())
+            stage = {
+                'users': users,
+                'requests': requests,
+                'throughput': requests / elapsed,
+                'error_rate': errors / requests if requests else 0.0,
+                'lock_errors': recorder.lock_errors,
+                'server': server_stats,
+                'steps': {step: {
+                    'count': len(values),
+                    'errors': recorder.errors[step],
+                    'p50_ms': statistics.median(values) * 1000,
+                    'p95_ms': percentile(values, 0.95) * 1000,
+                    'p99_ms': percentile(values, 0.99) * 1000,
+                } for step, values in sorted(recorder.latencies.items())},
+            }
+            report.append(stage)
+
+            print(f"\n== {users} user(s), {args.server} server: {stage['throughput']:.1f} req/s, "
+                  f"{stage['error_rate']:.2%} errors, {stage['lock_errors']} lock/busy seen by clients")
+            if server_stats:
+                print(f"   server: {server_stats['statements']} statements, {server_stats['sql_seconds']:.2f}s in SQL, "
+                      f"{server_stats['lock_errors']} 'database is locked', peak {server_stats['pool_peak']} "
+                      f"connections checked out")
+            print(f"   {'step':<28}{'count':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+            for step, row in stage['steps'].items():
+                print(f"   {step:<28}{row['count']:>7}{row['errors']:>6}{row['p50_ms']:>10.1f}"
+                      f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'server': args.server, 'mix': mix, 'stages': report}, f, indent=2)
+        print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
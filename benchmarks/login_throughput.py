@@ -0,0 +1,106 @@
+"""Login throughput against dashboard latency, for one password hashing setup.
+
+Runs ``--login-threads`` threads posting to /login while ``--page-threads``
+threads request the patient dashboard as logged-in users, for ``--seconds``.
+Reports logins/sec and the dashboard's p50/p99 latency. Run once per setup
+you want to compare, e.g. a capped hashing pool against an effectively
+unbounded one:
+
+    python benchmarks/login_throughput.py --hash-workers 1
+    python benchmarks/login_throughput.py --hash-workers 16
+    python benchmarks/login_throughput.py --method pbkdf2:sha256:1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--login-threads', type=int, default=8)
+    parser.add_argument('--page-threads', type=int, default=4)
+    parser.add_argument('--hash-workers', type=int, help='PASSWORD_HASH_WORKERS (default: the app default)')
+    parser.add_argument('--method', help='PASSWORD_HASH_METHOD (default: the app default)')
+    parser.add_argument('--users', type=int, default=100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='hms-login-')
+    os.environ['HMS_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'login.db')}"
+    if args.hash_workers:
+        os.environ['HMS_PASSWORD_HASH_WORKERS'] = str(args.hash_workers)
+    if args.method:
+        os.environ['HMS_PASSWORD_HASH_METHOD'] = args.method
+
+    from app import app, init_db, password_hasher
+    from models import db, User, Patient
+
+    init_db()
+    with app.app_context():
+        # Every user shares one hash so seeding costs a single KDF run
+        password = password_hasher.hash('bench-password')
+        users = []
+        for i in range(args.users):
+            user = User(email=f'login-bench-{i}@hospital.com', password=password, role='patient')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Patient(user_id=user.id, name=f'Login Bench {i}'))
+            users.append((user.id, user.email))
+        db.session.commit()
+
+    stop = threading.Event()
+    logins = []
+    login_errors = []
+    page_latencies = []
+
+    def log_in(n):
+        client = app.test_client(use_cookies=False)
+        i = n
+        while not stop.is_set():
+            response = client.post('/login', data={'email': users[i % len(users)][1], 'password': 'bench-password'})
+            (logins if response.status_code == 302 else login_errors).append(1)
+            i += args.login_threads
+
+    def browse(n):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(users[n % len(users)][0])
+            session['_fresh'] = True
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.get('/patient/dashboard')
+            page_latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+
+    threads = [threading.Thread(target=log_in, args=(n,)) for n in range(args.login_threads)]
+    threads += [threading.Thread(target=browse, args=(n,)) for n in range(args.page_threads)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(f'method={password_hasher.method} hash_workers={password_hasher.workers} cpus={os.cpu_count()} '
+          f'login_threads={args.login_threads} page_threads={args.page_threads}')
+    print(f'logins: {len(logins) / args.seconds:.1f}/s ({len(login_errors)} failed)')
+    print(f'dashboard: {len(page_latencies) / args.seconds:.1f} req/s '
+          f'p50={statistics.median(page_latencies) * 1000:.1f}ms '
+          f'p99={percentile(page_latencies, 0.99) * 1000:.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Check read/write routing and the staleness bound of the local replica.
+
+Runs the app against a throwaway primary and a backup-API replica and checks:
+- GETs to replica-read views use the replica once it has a snapshot.
+- A client that just wrote keeps reading the primary until the replica has
+  caught up with its write.
+- While a writer keeps adding doctors, no replica read is more than
+  REPLICA_MAX_LAG seconds behind.
+- Once syncing stops, reads fall back to the primary within REPLICA_MAX_LAG.
+
+    python benchmarks/replica_routing.py --interval 1 --max-lag 3 --seconds 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--interval', type=float, default=1.0)
+    parser.add_argument('--max-lag', type=float, default=3.0)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='hms-replica-')
+    os.environ['HMS_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'primary.db')}"
+    os.environ['HMS_REPLICA_URI'] = f"sqlite:///{os.path.join(workdir, 'replica.db')}"
+    os.environ['HMS_REPLICA_SYNC_INTERVAL'] = str(args.interval)
+    os.environ['HMS_REPLICA_MAX_LAG'] = str(args.max_lag)
+
+    from sqlalchemy import event
+    from app import app, init_db, replica
+    from models import db, REPLICA_BIND, User, Doctor
+
+    init_db()
+    hits = {'primary': 0, 'replica': 0}
+    with app.app_context():
+        for name, engine in (('primary', db.engines[None]), ('replica', db.engines[REPLICA_BIND])):
+            event.listen(engine, 'before_cursor_execute',
+                         lambda *_, name=name: hits.__setitem__(name, hits[name] + 1))
+
+    def admin_client():
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = '1'
+            session['_fresh'] = True
+        return client
+
+    def served_by(client, url, **kwargs):
+        hits.update(primary=0, replica=0)
+        response = client.get(url, **kwargs)
+        response.get_data()
+        assert response.status_code == 200, (url, response.status_code)
+        return 'replica' if hits['replica'] and not hits['primary'] else 'primary'
+
+    failures = []
+
+    def check(label, ok):
+        print(f"{'ok  ' if ok else 'FAIL'} {label}")
+        if not ok:
+            failures.append(label)
+
+    reader = admin_client()
+    check('reads stay on the primary before the first snapshot', served_by(reader, '/admin/doctors') == 'primary')
+    replica.start()
+    time.sleep(args.interval * 1.5)
+    check('replica-read view uses the replica', served_by(reader, '/admin/doctors') == 'replica')
+    check('other views stay on the primary', served_by(reader, '/admin/doctor/add') == 'primary')
+
+    writer = admin_client()
+    writer.post('/admin/doctor/add', data={'email': 'replica-check@hospital.com', 'password': 'replica',
+                                           'name': 'Dr. Replica Check', 'department_id': '1'})
+    check('a client reads its own write', served_by(writer, '/admin/doctors') == 'primary'
+          and 'Dr. Replica Check' in writer.get('/admin/doctors').get_data(as_text=True))
+    time.sleep(args.interval * 2.5)
+    check('the writer returns to the replica once it has caught up',
+          served_by(writer, '/admin/doctors') == 'replica')
+
+    # Staleness: a background writer inserts numbered doctors; every read
+    # through the replica must see each doctor committed more than max-lag ago
+    inserted = []
+    stop = threading.Event()
+
+    def insert_doctors():
+        n = 0
+        while not stop.is_set():
+            with app.app_context():
+                user = User(email=f'replica-lag-{n}@hospital.com', password='x', role='doctor')
+                db.session.add(user)
+                db.session.flush()
+                db.session.add(Doctor(user_id=user.id, department_id=1, name=f'Lag {n:06d}'))
+                db.session.commit()
+            inserted.append(time.time())
+            n += 1
+            time.sleep(0.05)
+
+    thread = threading.Thread(target=insert_doctors)
+    thread.start()
+    worst = 0.0
+    reads = 0
+    deadline = time.time() + args.seconds
+    while time.time() < deadline:
+        client = app.test_client()
+        hits.update(primary=0, replica=0)
+        names = [d['name'] for d in client.get('/api/v2/doctors?fields=name&limit=1000').get_json()['items']]
+        read_at = time.time()
+        if not hits['replica'] or hits['primary']:
+            continue
+        visible = sum(1 for name in names if name.startswith('Lag '))
+        if visible < len(inserted):
+            worst = max(worst, read_at - inserted[visible])
+        reads += 1
+        time.sleep(0.1)
+    stop.set()
+    thread.join()
+    check(f'worst observed staleness {worst:.2f}s over {reads} replica reads is within {args.max_lag}s',
+          reads > 0 and worst <= args.max_lag)
+
+    replica.stop()
+    time.sleep(args.max_lag + args.interval)
+    check('reads fall back to the primary once the replica is too old',
+          served_by(reader, '/admin/doctors') == 'primary')
+
+    print('OK' if not failures else 'FAILED')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
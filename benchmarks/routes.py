@@ -0,0 +1,279 @@
+"""Per-route benchmark: latency, query count and peak memory for every GET route
+and the main write paths.
+
+Calls every GET route in the app through the Flask test client as the role
+that can open it (anonymous, admin, doctor or patient), then POSTs valid
+forms to login, booking, cancel, complete and the availability save (login
+uses the first admin and ``--admin-password``). It records p50/p95
+latency, SQL statements per request (flagging repeated query shapes, the N+1
+pattern) and peak Python memory per request, and writes the results to a JSON
+file. Pass an earlier file with ``--compare``
+to list regressions; the exit status is 1 if there are any.
+
+By default it seeds a throwaway database. Use ``--database`` to measure an
+existing one, e.g. after ``flask --app app seed-data``:
+
+    python benchmarks/routes.py --output baseline.json
+    python benchmarks/routes.py --compare baseline.json --output current.json
+    python benchmarks/routes.py --database sqlite:////path/to/hospital.db --iterations 50
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# GET routes that change state, so they are not measured
+SKIP = {'static', 'logout'}
+
+# Query strings that make a route do its real work
+QUERY = {
+    'patient_earliest_slots': {'department': 1},
+    'api_v2_appointments': {'limit': 100},
+    'admin_export_appointments': {'status': 'Booked'},
+}
+
+
+def role_for(rule):
+    for role in ('admin', 'doctor', 'patient'):
+        if rule.rule.startswith(f'/{role}/'):
+            return role
+    if 'appointments' in rule.rule and rule.rule.startswith('/api/v2/'):
+        return 'admin'
+    return None
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='Measure this database instead of seeding a throwaway one.')
+    parser.add_argument('--doctors', type=int, default=100)
+    parser.add_argument('--patients', type=int, default=5000)
+    parser.add_argument('--appointments', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--output', default='routes-baseline.json')
+    parser.add_argument('--compare', help='Baseline JSON from an earlier run.')
+    parser.add_argument('--admin-password', default='admin123', help='Password of the first admin, for the login timing.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p50 slowdown (0.25 = 25%%).')
+    args = parser.parse_args()
+
+    if args.database:
+        os.environ['HMS_DATABASE_URI'] = args.database
+    else:
+        workdir = tempfile.mkdtemp(prefix='hms-routes-')
+        os.environ['HMS_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'routes.db')}"
+
+    from flask import url_for
+    from sqlalchemy import func
+    from app import app, init_db, refresh_slots, availability_days, sql_tracer
+    from models import db, User, Doctor, Patient, Appointment
+    from services import seed_synthetic, extend_slot_index, earliest_slots, book_slot, expand_availability
+
+    init_db()
+    with app.app_context():
+        if not args.database:
+            seed_synthetic(db.engine, doctors=args.doctors, patients=args.patients, appointments=args.appointments,
+                           future_days=app.config['AVAILABILITY_DAYS'], slot_minutes=app.config['SLOT_MINUTES'])
+            days = availability_days()
+            refresh_slots(days[0], days[-1])
+            db.session.commit()
+
+        # Sample the busiest doctor and patient so their pages show real volume
+        doctor = db.session.query(Doctor).join(Appointment).group_by(Doctor.id).order_by(
+            func.count(Appointment.id).desc()).first()
+        patient = db.session.query(Patient).join(Appointment).group_by(Patient.id).order_by(
+            func.count(Appointment.id).desc()).first()
+        appointment = Appointment.query.filter_by(doctor_id=doctor.id, status='Booked').first() \
+            or Appointment.query.filter_by(doctor_id=doctor.id).first()
+        users = {
+            'admin': User.query.filter_by(role='admin').first().id,
+            'doctor': doctor.user_id,
+            'patient': patient.user_id,
+        }
+        values = {'doctor_id': doctor.id, 'patient_id': patient.id, 'appointment_id': appointment.id,
+                  'department_id': doctor.department_id}
+        meta = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'iterations': args.iterations,
+            'rows': {model.__tablename__: model.query.count() for model in (User, Doctor, Patient, Appointment)},
+        }
+
+    clients = {}
+
+    def client_for(role):
+        if role not in clients:
+            client = app.test_client()
+            if role:
+                with client.session_transaction() as session:
+                    session['_user_id'] = str(users[role])
+                    session['_fresh'] = True
+            clients[role] = client
+        return clients[role]
+
+    results = {}
+
+    def measure(key, url, prepare):
+        """Time the request ``prepare()`` returns a sender for; setup inside prepare is not timed."""
+        prepare()()  # warm-up: caches, statement compilation
+        latencies, statements, repeated = [], [], {}
+        for _ in range(args.iterations):
+            send = prepare()
+            log = sql_tracer.start(key)
+            started = time.perf_counter()
+            response = send()
+            latencies.append(time.perf_counter() - started)
+            sql_tracer.stop(log)
+            statements.append(log.count)
+            repeated.update(log.repeated(app.config['SQL_REPEAT_THRESHOLD']))
+
+        # Memory is traced in a separate pass so tracing does not skew latency
+        send = prepare()
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        send()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        tracemalloc.stop()
+
+        results[key] = {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'mean_ms': round(statistics.mean(latencies) * 1000, 3),
+            'queries': max(statements),
+            'peak_kib': round(peak / 1024, 1),
+            'repeated_queries': repeated,
+        }
+        print(f"{key:<62}{response.status_code:>4}{results[key]['p50_ms']:>10.2f}ms p50"
+              f"{results[key]['p95_ms']:>10.2f}ms p95{results[key]['queries']:>5} q"
+              f"{results[key]['peak_kib']:>10.1f} KiB")
+        for shape, n in repeated.items():
+            print(f'    possible N+1: {n} x {shape}')
+
+    def sender(client, method, url, data=None):
+        def send():
+            response = client.open(url, method=method, data=data)
+            response.get_data()
+            return response
+        return send
+
+    rules = sorted(app.url_map.iter_rules(), key=lambda r: r.rule)
+    for rule in rules:
+        if rule.endpoint in SKIP or 'GET' not in rule.methods:
+            continue
+        role = role_for(rule)
+        with app.test_request_context():
+            url = url_for(rule.endpoint, **{arg: values[arg] for arg in rule.arguments},
+                          **QUERY.get(rule.endpoint, {}))
+        send = sender(client_for(role), 'GET', url)
+        measure(f'GET {rule.rule} [{role or "anonymous"}]', url, lambda: send)
+
+    # Write paths. Every request gets fresh state set up outside the timing: a
+    # new anonymous client per login, a distinct open slot per booking, and a
+    # Booked appointment per cancel or complete, on days far past the horizon
+    # so they never collide with seeded ones.
+    requests_needed = args.iterations + 2
+    today = date.today()
+    spare_days = itertools.count(1000)
+    with app.app_context():
+        days = availability_days()
+        extend_slot_index(db.session, days[-1], app.config['SLOT_MINUTES'])
+        open_slots = iter(earliest_slots(db.session, values['department_id'], days[1], days[-1],
+                                         app.config['SLOT_MINUTES'], limit=requests_needed))
+        db.session.commit()
+        admin_email = db.session.get(User, users['admin']).email
+
+    def booked_appointment():
+        appointment_date = today + timedelta(days=next(spare_days))
+        with app.app_context():
+            book_slot(db.session, values['patient_id'], values['doctor_id'], appointment_date, '09:00')
+            db.session.commit()
+            return Appointment.query.filter_by(doctor_id=values['doctor_id'], appointment_date=appointment_date,
+                                               appointment_time='09:00', status='Booked').one().id
+
+    def login():
+        return sender(app.test_client(), 'POST', '/login',
+                      {'email': admin_email, 'password': args.admin_password})
+
+    def book():
+        slot_date, slot_time, doctor_id = next(open_slots)
+        with app.test_request_context():
+            url = url_for('patient_book_appointment', doctor_id=doctor_id)
+        return sender(client_for('patient'), 'POST', url, {
+            'appointment_date': slot_date.isoformat(), 'appointment_time': slot_time, 'reason': 'Benchmark'})
+
+    def cancel():
+        with app.test_request_context():
+            url = url_for('patient_cancel_appointment', appointment_id=booked_appointment())
+        return sender(client_for('patient'), 'POST', url)
+
+    def complete():
+        with app.test_request_context():
+            url = url_for('doctor_complete_appointment', appointment_id=booked_appointment())
+        return sender(client_for('doctor'), 'POST', url, {
+            'diagnosis': 'Benchmark', 'prescription': 'Rest', 'notes': '', 'follow_up_date': ''})
+
+    closed = itertools.count()
+
+    def save_availability():
+        # Alternately close and reopen the first open day so every save writes
+        with app.app_context():
+            openings = expand_availability(days[0], days[-1], [values['doctor_id']])
+        form = {}
+        for opening in openings:
+            key = opening.date.strftime('%Y-%m-%d')
+            form.update({f'available_{key}': 'on', f'start_time_{key}': opening.start_time,
+                         f'end_time_{key}': opening.end_time})
+        if openings and next(closed) % 2 == 0:
+            del form[f"available_{openings[0].date.strftime('%Y-%m-%d')}"]
+        return sender(client_for('doctor'), 'POST', '/doctor/availability', form)
+
+    for rule, role, prepare in [('/login', 'anonymous', login),
+                                ('/patient/book-appointment/<int:doctor_id>', 'patient', book),
+                                ('/patient/appointment/<int:appointment_id>/cancel', 'patient', cancel),
+                                ('/doctor/appointment/<int:appointment_id>/complete', 'doctor', complete),
+                                ('/doctor/availability', 'doctor', save_availability)]:
+        measure(f'POST {rule} [{role}]', rule, prepare)
+
+    with open(args.output, 'w') as f:
+        json.dump({'meta': meta, 'routes': results}, f, indent=2, sort_keys=True)
+    print(f'Wrote {args.output}')
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)['routes']
+    regressions = []
+    for key, current in results.items():
+        if current['status'] >= 500:
+            regressions.append(f"{key}: status {current['status']}")
+        before = baseline.get(key)
+        if before is None:
+            continue
+        if current['queries'] > before['queries']:
+            regressions.append(f"{key}: {before['queries']} -> {current['queries']} queries")
+        if current['p50_ms'] > before['p50_ms'] * (1 + args.tolerance) and current['p50_ms'] - before['p50_ms'] > 1:
+            regressions.append(f"{key}: p50 {before['p50_ms']:.2f}ms -> {current['p50_ms']:.2f}ms")
+    for line in regressions:
+        print(f'REGRESSION {line}')
+    print(f'{len(regressions)} regression(s) against {args.compare}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Mixed read/write concurrency under each SQLite engine profile.
+
+Each profile runs in its own process against its own throwaway database, so
+no engine or pragma state leaks between runs. ``--writers`` threads book
+random slots while ``--readers`` threads load booking pages and the doctor
+API, all for ``--seconds``. For each profile it prints throughput,
+p50/p99 latency, and how many requests hit "database is locked": either a
+5xx or the booking page's "busy" message.
+
+    python benchmarks/sqlite_profile.py --seconds 20 --writers 8 --readers 8
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def run_profile(args):
+    """Child process: seed, drive the workload, print one JSON line of results."""
+    from app import app, init_db
+    from models import db, User, Doctor, Patient, WeeklyAvailability
+
+    init_db()
+    with app.app_context():
+        doctor_ids, patient_ids = [], []
+        for i in range(args.doctors):
+            user = User(email=f'profile-doctor-{i}@hospital.com', password='x', role='doctor')
+            db.session.add(user)
+            db.session.flush()
+            doctor = Doctor(user_id=user.id, department_id=1 + i % 6, name=f'Dr. Profile {i}')
+            db.session.add(doctor)
+            db.session.flush()
+            doctor_ids.append(doctor.id)
+            for weekday in range(7):
+                db.session.add(WeeklyAvailability(doctor_id=doctor.id, weekday=weekday,
+                                                  start_time='08:00', end_time='20:00'))
+        for i in range(args.patients):
+            user = User(email=f'profile-patient-{i}@hospital.com', password='x', role='patient')
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Patient(user_id=user.id, name=f'Profile Patient {i}'))
+            patient_ids.append(user.id)
+        db.session.commit()
+
+    slot_minutes = app.config['SLOT_MINUTES']
+    times = [f'{m // 60:02d}:{m % 60:02d}' for m in range(8 * 60, 20 * 60, slot_minutes)]
+    days = [date.today() + timedelta(days=d) for d in range(1, 8)]
+    stop = threading.Event()
+    results = {'read': [], 'write': []}
+    outcomes = {'booked': 0, 'rejected': 0, 'busy': 0, '5xx': 0}
+    lock = threading.Lock()
+
+    def client_for(n):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(patient_ids[n % len(patient_ids)])
+            session['_fresh'] = True
+        return client
+
+    def write(n):
+        client = client_for(n)
+        while not stop.is_set():
+            started = time.perf_counter()
+            response = client.post(f'/patient/book-appointment/{random.choice(doctor_ids)}', data={
+                'appointment_date': random.choice(days).strftime('%Y-%m-%d'),
+                'appointment_time': random.choice(times)
+            })
+            elapsed = time.perf_counter() - started
+            if response.status_code >= 500:
+                outcome = '5xx'
+            elif response.headers.get('Location', '').endswith('/patient/appointments'):
+                outcome = 'booked'
+            else:
+                with client.session_transaction() as session:
+                    messages = ' '.join(message for _, message in session.pop('_flashes', []))
+                outcome = 'busy' if 'busy' in messages else 'rejected'
+            with lock:
+                results['write'].append(elapsed)
+                outcomes[outcome] += 1
+
+    def read(n):
+        client = client_for(n)
+        while not stop.is_set():
+            url = random.choice([f'/patient/book-appointment/{random.choice(doctor_ids)}', '/api/v2/doctors'])
+            started = time.perf_counter()
+            response = client.get(url)
+            response.get_data()
+            elapsed = time.perf_counter() - started
+            with lock:
+                results['read'].append(elapsed)
+                if response.status_code >= 500:
+                    outcomes['5xx'] += 1
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(args.writers)]
+    threads += [threading.Thread(target=read, args=(n,)) for n in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    print(json.dumps({
+        'profile': app.config['SQLITE_PROFILE'],
+        'reads_per_s': len(results['read']) / args.seconds,
+        'writes_per_s': len(results['write']) / args.seconds,
+        'read_p50_ms': percentile(results['read'], 0.5) * 1000,
+        'read_p99_ms': percentile(results['read'], 0.99) * 1000,
+        'write_p50_ms': percentile(results['write'], 0.5) * 1000,
+        'write_p99_ms': percentile(results['write'], 0.99) * 1000,
+        **outcomes
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', default='default,tuned')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--doctors', type=int, default=20)
+    parser.add_argument('--patients', type=int, default=200)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_profile(args)
+
+    workdir = tempfile.mkdtemp(prefix='hms-profile-')
+    rows = []
+    for profile in args.profiles.split(','):
+        env = dict(os.environ, HMS_SQLITE_PROFILE=profile,
+                   HMS_DATABASE_URI=f"sqlite:///{os.path.join(workdir, profile + '.db')}")
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'] + sys.argv[1:],
+                                env=env, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+        rows.append(json.loads(output.strip().splitlines()[-1]))
+
+    columns = ['profile', 'reads_per_s', 'read_p50_ms', 'read_p99_ms', 'writes_per_s', 'write_p50_ms',
+               'write_p99_ms', 'booked', 'rejected', 'busy', '5xx']
+    print(''.join(f'{c:>14}' for c in columns))
+    for row in rows:
+        print(''.join(f'{row[c]:>14.1f}' if isinstance(row[c], float) else f'{row[c]:>14}' for c in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,32 @@
 from flask_sqlalchemy import SQLAlchemy
+from models.routing import RoutingSession, REPLICA_BIND
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Import all models to make them available
 from models.user import User
 from models.department import Department
 from models.doctor import Doctor
 from models.doctor_availability import DoctorAvailability
+from models.weekly_availability import WeeklyAvailability
 from models.patient import Patient
 from models.appointment import Appointment
 from models.treatment import Treatment
+from models.counter import Counter
+from models.slot_bitmap import SlotBitmap
 
 # Export all models
 __all__ = [
     'db',
+    'REPLICA_BIND',
     'User',
     'Department',
     'Doctor',
     'DoctorAvailability',
+    'WeeklyAvailability',
     'Patient',
     'Appointment',
-    'Treatment'
+    'Treatment',
+    'Counter',
+    'SlotBitmap'
 ]
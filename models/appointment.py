@@ -17,5 +17,15 @@ class Appointment(db.Model):
     treatment = db.relationship('Treatment', backref='appointment', uselist=False, cascade='all, delete-orphan')
     
     __table_args__ = (
-        db.UniqueConstraint('doctor_id', 'appointment_date', 'appointment_time', name='_doctor_datetime_uc'),
+        # One live appointment per slot; cancelled rows are kept alongside the rebooking
+        db.Index('uq_appointments_doctor_slot', 'doctor_id', 'appointment_date', 'appointment_time',
+                 unique=True, sqlite_where=db.text("status != 'Cancelled'")),
+        # Doctor dashboard / schedule: doctor_id = ? AND appointment_date range AND status = ?
+        db.Index('ix_appointments_doctor_date_status', 'doctor_id', 'appointment_date', 'status'),
+        # Patient dashboard / history: patient_id = ? AND status = ? ORDER BY appointment_date
+        db.Index('ix_appointments_patient_status_date', 'patient_id', 'status', 'appointment_date'),
+        # Admin appointment listing, keyset paginated on (appointment_date, id)
+        db.Index('ix_appointments_date', 'appointment_date'),
+        # Admin dashboard recent list: ORDER BY created_at DESC LIMIT 10
+        db.Index('ix_appointments_created_at', 'created_at'),
     )
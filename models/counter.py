@@ -0,0 +1,8 @@
+from models import db
+
+class Counter(db.Model):
+    __tablename__ = 'counters'
+    # Maintained by triggers (see services/counters.py); '' status means "all rows"
+    entity = db.Column(db.String(50), primary_key=True)  # 'doctors', 'patients', 'appointments'
+    status = db.Column(db.String(20), primary_key=True, default='')
+    value = db.Column(db.Integer, nullable=False, default=0)
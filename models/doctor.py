@@ -15,3 +15,13 @@ class Doctor(db.Model):
     
     appointments = db.relationship('Appointment', backref='doctor', lazy=True, cascade='all, delete-orphan')
     availability = db.relationship('DoctorAvailability', backref='doctor', lazy=True, cascade='all, delete-orphan')
+    weekly_availability = db.relationship('WeeklyAvailability', backref='doctor', lazy=True, cascade='all, delete-orphan')
+    slot_bitmaps = db.relationship('SlotBitmap', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Profile lookup on every doctor route: filter_by(user_id=current_user.id)
+        db.Index('ix_doctors_user_id', 'user_id'),
+        db.Index('ix_doctors_department_id', 'department_id'),
+        # Admin listing, keyset paginated on (name, id)
+        db.Index('ix_doctors_name', 'name'),
+    )
\ No newline at end of file
@@ -2,6 +2,7 @@ from models import db
 from datetime import datetime
 
 class DoctorAvailability(db.Model):
+    # Date-specific hours; a row overrides the doctor's WeeklyAvailability for that date
     __tablename__ = 'doctor_availability'
     id = db.Column(db.Integer, primary_key=True)
     doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
@@ -11,4 +12,8 @@ class DoctorAvailability(db.Model):
     is_available = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    __table_args__ = (db.UniqueConstraint('doctor_id', 'date', name='_doctor_date_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('doctor_id', 'date', name='_doctor_date_uc'),
+        # Patient dashboard "available doctors": date range AND is_available
+        db.Index('ix_doctor_availability_date_available', 'date', 'is_available'),
+    )
@@ -15,3 +15,10 @@ class Patient(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     appointments = db.relationship('Appointment', backref='patient', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Profile lookup on every patient route: filter_by(user_id=current_user.id)
+        db.Index('ix_patients_user_id', 'user_id'),
+        # Admin listing, keyset paginated on (name, id)
+        db.Index('ix_patients_name', 'name'),
+    )
\ No newline at end of file
@@ -0,0 +1,30 @@
+from flask import g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, TextClause
+
+REPLICA_BIND = 'replica'
+
+
+def _is_read(clause):
+    if isinstance(clause, Select):
+        return True
+    return isinstance(clause, TextClause) and clause.text.lstrip()[:6].upper() == 'SELECT'
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to the ``replica`` bind while ``g.db_replica`` is set.
+
+    Flushes and every other statement go to the primary as usual and set
+    ``g.db_wrote``, so the app can keep that client on the primary until the
+    replica has caught up with its write.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if not self._flushing and _is_read(clause):
+                engine = self._db.engines.get(REPLICA_BIND) if g.get('db_replica') else None
+                if engine is not None:
+                    return engine
+            elif self._flushing or clause is not None:
+                g.db_wrote = True
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -0,0 +1,10 @@
+from models import db
+
+class SlotBitmap(db.Model):
+    # Search index of open slots per doctor-day, kept in sync by services/slot_index.py
+    __tablename__ = 'slot_bitmaps'
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    free_mask = db.Column(db.String(40), nullable=False)  # hex bitmap, bit i = slot i open (see services/slots.py)
+    
+    __table_args__ = (db.Index('ix_slot_bitmaps_date', 'date'),)
@@ -11,3 +11,5 @@ class Treatment(db.Model):
     follow_up_date = db.Column(db.Date)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_treatments_appointment_id', 'appointment_id'),)
@@ -0,0 +1,13 @@
+from models import db
+from datetime import datetime
+
+class WeeklyAvailability(db.Model):
+    __tablename__ = 'weekly_availability'
+    id = db.Column(db.Integer, primary_key=True)
+    doctor_id = db.Column(db.Integer, db.ForeignKey('doctors.id'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday ... 6 = Sunday
+    start_time = db.Column(db.String(10), nullable=False)  # Format: "09:00"
+    end_time = db.Column(db.String(10), nullable=False)    # Format: "17:00"
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('doctor_id', 'weekday', name='_doctor_weekday_uc'),)
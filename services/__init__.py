@@ -0,0 +1,83 @@
+from services.pagination import KeysetPage, keyset_paginate, keyset_filter, encode_cursor, decode_cursor
+from services.loading import eager
+from services.migrations import create_missing_indexes, drop_stale_unique_constraints
+from services.search import setup_search_index, search_matches
+from services.counters import (setup_counters, reconcile_counters, read_counters, read_availability_version,
+                               read_schedule_version)
+from services.slots import free_slots, is_open, parse_time, canonical_time
+from services.booking import book_slot, next_free_slot
+from services.availability import Opening, expand_availability, save_availability, save_weekly_template
+from services.slot_index import refresh_slot_index, extend_slot_index, earliest_slots
+from services.catalog import (VersionedCache, read_catalog_version, load_departments, load_doctors,
+                              load_department_stats)
+from services.api import DOCTOR_FIELDS, APPOINTMENT_FIELDS, parse_fields, select_fields, stream_json
+from services.export import EXPORT_FORMATS, export_appointments
+from services.importer import ImportResult, IMPORT_COLUMNS, import_users
+from services.passwords import PasswordHasher
+from services.identity import Identity, resolve_identity, forget_identity
+from services.engine import SQLITE_PROFILES, engine_options, apply_sqlite_profile, sqlite_settings
+from services.replica import ReplicaSync
+from services.seeding import seed_synthetic
+from services.sql_trace import QueryLog, QueryBudgetExceeded, SQLTracer, query_shape
+from services.metrics import Metrics
+
+__all__ = [
+    'KeysetPage',
+    'keyset_paginate',
+    'keyset_filter',
+    'encode_cursor',
+    'decode_cursor',
+    'eager',
+    'create_missing_indexes',
+    'drop_stale_unique_constraints',
+    'setup_search_index',
+    'search_matches',
+    'setup_counters',
+    'reconcile_counters',
+    'read_counters',
+    'read_availability_version',
+    'read_schedule_version',
+    'free_slots',
+    'is_open',
+    'parse_time',
+    'canonical_time',
+    'book_slot',
+    'next_free_slot',
+    'Opening',
+    'expand_availability',
+    'save_availability',
+    'save_weekly_template',
+    'refresh_slot_index',
+    'extend_slot_index',
+    'earliest_slots',
+    'VersionedCache',
+    'read_catalog_version',
+    'load_departments',
+    'load_doctors',
+    'load_department_stats',
+    'DOCTOR_FIELDS',
+    'APPOINTMENT_FIELDS',
+    'parse_fields',
+    'select_fields',
+    'stream_json',
+    'EXPORT_FORMATS',
+    'export_appointments',
+    'ImportResult',
+    'IMPORT_COLUMNS',
+    'import_users',
+    'PasswordHasher',
+    'Identity',
+    'resolve_identity',
+    'forget_identity',
+    'SQLITE_PROFILES',
+    'engine_options',
+    'apply_sqlite_profile',
+    'sqlite_settings',
+    'ReplicaSync',
+    'seed_synthetic',
+    'QueryLog',
+    'QueryBudgetExceeded',
+    'SQLTracer',
+    'query_shape',
+    'Metrics'
+]
@@ -0,0 +1,98 @@
+"""Streaming JSON for the v2 API.
+
+A response is written row by row from one keyset-ordered query that selects
+only the requested fields, so memory stays flat whatever the page size. The
+body is ``{"items": [...], "next_cursor": ...}``; pass ``next_cursor`` back as
+``after`` for the next page.
+"""
+import json
+from datetime import date, datetime
+from models import Appointment, Department, Doctor, Patient
+from services.pagination import encode_cursor, keyset_filter
+
+# field name -> (column, joins it needs). Joins are (target, onclause) pairs and
+# are added once each, in order, only when a requested field needs them.
+_DEPARTMENT = (Department, Department.id == Doctor.department_id)
+_DOCTOR = (Doctor, Doctor.id == Appointment.doctor_id)
+_PATIENT = (Patient, Patient.id == Appointment.patient_id)
+
+DOCTOR_FIELDS = {
+    'id': (Doctor.id, ()),
+    'name': (Doctor.name, ()),
+    'department_id': (Doctor.department_id, ()),
+    'department': (Department.name, (_DEPARTMENT,)),
+    'qualification': (Doctor.qualification, ()),
+    'experience_years': (Doctor.experience_years, ()),
+    'fee': (Doctor.consultation_fee, ()),
+}
+
+APPOINTMENT_FIELDS = {
+    'id': (Appointment.id, ()),
+    'date': (Appointment.appointment_date, ()),
+    'time': (Appointment.appointment_time, ()),
+    'status': (Appointment.status, ()),
+    'reason': (Appointment.reason, ()),
+    'doctor_id': (Appointment.doctor_id, ()),
+    'doctor': (Doctor.name, (_DOCTOR,)),
+    'department': (Department.name, (_DOCTOR, _DEPARTMENT)),
+    'patient_id': (Appointment.patient_id, ()),
+    'patient': (Patient.name, (_PATIENT,)),
+}
+
+
+def parse_fields(value, spec):
+    """Requested field names from a ``fields=a,b`` parameter, in spec order.
+
+    Every field is returned when ``value`` is empty. Raises ValueError naming
+    any unknown field.
+    """
+    if not value:
+        return list(spec)
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - set(spec)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return [name for name in spec if name in requested]
+
+
+def select_fields(query, spec, fields, keyset):
+    """Narrow ``query`` to ``fields`` plus the ``keyset`` columns, adding only the joins they need."""
+    joins = []
+    for name in fields:
+        for join in spec[name][1]:
+            if join not in joins:
+                joins.append(join)
+    for target, onclause in joins:
+        query = query.outerjoin(target, onclause)
+    columns = [spec[name][0].label(name) for name in fields]
+    columns += [column.label(f'_k{i}') for i, column in enumerate(keyset)]
+    return query.with_entities(*columns)
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def stream_json(query, fields, keyset, after=None, limit=100, chunk_size=500):
+    """Yield one JSON page of ``query`` (built by select_fields) as text chunks.
+
+    Fetches ``limit + 1`` rows in ``chunk_size`` batches; the extra row only
+    tells us whether there is a next page.
+    """
+    query = keyset_filter(query, keyset, after).limit(limit + 1).yield_per(chunk_size)
+    yield '{"items":['
+    last = None
+    has_more = False
+    for count, row in enumerate(query):
+        if count == limit:
+            has_more = True
+            continue
+        item = {name: getattr(row, name) for name in fields}
+        yield (',' if count else '') + json.dumps(item, default=_default, separators=(',', ':'))
+        last = row
+    next_cursor = None
+    if has_more and last is not None:
+        next_cursor = encode_cursor([getattr(last, f'_k{i}') for i in range(len(keyset))])
+    yield '],"next_cursor":' + json.dumps(next_cursor) + '}'
@@ -0,0 +1,124 @@
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy.dialects.sqlite import insert
+from models import DoctorAvailability, WeeklyAvailability
+
+# One concrete available day, from either a weekly template or a date override.
+# Shaped like DoctorAvailability so callers can use the two interchangeably.
+Opening = namedtuple('Opening', ['doctor_id', 'date', 'start_time', 'end_time'])
+
+
+def expand_availability(start, end, doctor_ids=None):
+    """Concrete openings between ``start`` and ``end`` (inclusive), sorted by date.
+
+    Weekly templates are expanded only for the requested range, so months of
+    repeated rows are never stored. A DoctorAvailability row for a date wins
+    over the template: ``is_available=False`` closes the day, otherwise its
+    hours replace the template's. Always two queries, whatever the range.
+    """
+    weekly_query = WeeklyAvailability.query
+    override_query = DoctorAvailability.query.filter(
+        DoctorAvailability.date >= start,
+        DoctorAvailability.date <= end
+    )
+    if doctor_ids is not None:
+        weekly_query = weekly_query.filter(WeeklyAvailability.doctor_id.in_(doctor_ids))
+        override_query = override_query.filter(DoctorAvailability.doctor_id.in_(doctor_ids))
+
+    weekly = {}
+    for row in weekly_query:
+        weekly.setdefault(row.doctor_id, {})[row.weekday] = row
+    overrides = {(row.doctor_id, row.date): row for row in override_query}
+
+    openings = []
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    for doctor_id in sorted(set(weekly) | {doctor_id for doctor_id, _ in overrides}):
+        template = weekly.get(doctor_id, {})
+        for day in days:
+            row = overrides.get((doctor_id, day)) or template.get(day.weekday())
+            if row is not None and getattr(row, 'is_available', True):
+                openings.append(Opening(doctor_id, day, row.start_time, row.end_time))
+    openings.sort(key=lambda o: (o.date, o.doctor_id))
+    return openings
+
+
+def save_availability(session, doctor_id, dates, overrides):
+    """Bring a doctor's date overrides for ``dates`` in line with ``overrides``.
+
+    ``overrides`` maps each date that needs one to ``(start_time, end_time,
+    is_available)``; dates in ``dates`` but not in ``overrides`` fall back to
+    the weekly template, so their stored rows are deleted. Only rows that
+    actually change are written: one upsert batch for new or edited days and
+    one DELETE for cleared ones, in the caller's transaction. Returns
+    ``(upserted, deleted)`` counts.
+    """
+    stored = {a.date: a for a in DoctorAvailability.query.filter(
+        DoctorAvailability.doctor_id == doctor_id,
+        DoctorAvailability.date.in_(dates)
+    )}
+
+    changed = []
+    for day, (start_time, end_time, is_available) in overrides.items():
+        row = stored.get(day)
+        if row and (row.start_time, row.end_time, row.is_available) == (start_time, end_time, is_available):
+            continue
+        changed.append({
+            'doctor_id': doctor_id,
+            'date': day,
+            'start_time': start_time,
+            'end_time': end_time,
+            'is_available': is_available,
+            'created_at': datetime.utcnow()
+        })
+    removed = [day for day in stored if day not in overrides]
+
+    if changed:
+        stmt = insert(DoctorAvailability)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['doctor_id', 'date'],
+            set_={
+                'start_time': stmt.excluded.start_time,
+                'end_time': stmt.excluded.end_time,
+                'is_available': stmt.excluded.is_available
+            }
+        )
+        session.execute(stmt, changed)
+    if removed:
+        DoctorAvailability.query.filter(
+            DoctorAvailability.doctor_id == doctor_id,
+            DoctorAvailability.date.in_(removed)
+        ).delete(synchronize_session=False)
+    return len(changed), len(removed)
+
+
+def save_weekly_template(session, doctor_id, hours):
+    """Replace a doctor's weekly template with ``hours`` ({weekday: (start, end)}).
+
+    Same diff-and-upsert approach as save_availability. Returns
+    ``(upserted, deleted)`` counts.
+    """
+    stored = {row.weekday: row for row in WeeklyAvailability.query.filter_by(doctor_id=doctor_id)}
+
+    changed = [{
+        'doctor_id': doctor_id,
+        'weekday': weekday,
+        'start_time': start_time,
+        'end_time': end_time,
+        'created_at': datetime.utcnow()
+    } for weekday, (start_time, end_time) in hours.items()
+        if weekday not in stored or (stored[weekday].start_time, stored[weekday].end_time) != (start_time, end_time)]
+    removed = [weekday for weekday in stored if weekday not in hours]
+
+    if changed:
+        stmt = insert(WeeklyAvailability)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['doctor_id', 'weekday'],
+            set_={'start_time': stmt.excluded.start_time, 'end_time': stmt.excluded.end_time}
+        )
+        session.execute(stmt, changed)
+    if removed:
+        WeeklyAvailability.query.filter(
+            WeeklyAvailability.doctor_id == doctor_id,
+            WeeklyAvailability.weekday.in_(removed)
+        ).delete(synchronize_session=False)
+    return len(changed), len(removed)
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+from models import Appointment
+from services.slots import free_slots, canonical_time
+
+
+def book_slot(session, patient_id, doctor_id, appointment_date, appointment_time, reason=None,
+              retries=5, backoff=0.05):
+    """Claim a slot in a single INSERT ... ON CONFLICT DO NOTHING statement.
+
+    The partial unique index on (doctor_id, appointment_date, appointment_time)
+    over rows that are not Cancelled is the lock: a free or cancelled slot gets
+    a new row, a slot that is already Booked/Completed inserts nothing.
+    Cancelled appointments stay as they were. ``appointment_time`` is stored in
+    canonical ``'HH:MM'`` form, so every spelling of a slot hits the same key.
+    Returns True if this call got the slot, False if someone else holds it.
+    "database is locked" is retried with backoff and re-raised once
+    ``retries`` run out.
+    """
+    appointment_time = canonical_time(appointment_time)
+    if appointment_time is None:
+        raise ValueError('appointment_time must be HH:MM')
+    now = datetime.utcnow()
+    stmt = insert(Appointment).values(
+        patient_id=patient_id,
+        doctor_id=doctor_id,
+        appointment_date=appointment_date,
+        appointment_time=appointment_time,
+        reason=reason,
+        status='Booked',
+        created_at=now,
+        updated_at=now
+    ).on_conflict_do_nothing(
+        index_elements=['doctor_id', 'appointment_date', 'appointment_time'],
+        index_where=text("status != 'Cancelled'")
+    )
+    for attempt in range(retries + 1):
+        try:
+            result = session.execute(stmt)
+            session.commit()
+            return result.rowcount == 1
+        except OperationalError:
+            session.rollback()
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+
+def next_free_slot(session, avail, after_time, slot_minutes):
+    """Earliest open slot on ``avail``'s date starting after ``after_time``, else the earliest."""
+    taken = [t for (t,) in session.query(Appointment.appointment_time).filter(
+        Appointment.doctor_id == avail.doctor_id,
+        Appointment.appointment_date == avail.date,
+        Appointment.status != 'Cancelled'
+    )]
+    times = free_slots([avail], {avail.date: taken}, slot_minutes).get(avail.date, [])
+    later = [t for t in times if t > after_time]
+    return (later or times or [None])[0]
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import case, func, text
+from models import Appointment, Department, Doctor, User
+from services.availability import expand_availability
+from services.loading import eager
+
+# Plain snapshots so cached entries never touch a (closed) session.
+DepartmentEntry = namedtuple('DepartmentEntry', ['id', 'name', 'description'])
+DoctorEntry = namedtuple('DoctorEntry', ['id', 'name', 'phone', 'qualification', 'experience_years',
+                                         'consultation_fee', 'department_id', 'department'])
+
+
+class VersionedCache:
+    """Bounded LRU cache whose entries are valid for one catalog version.
+
+    An entry is served only while the caller's version matches the one it was
+    stored under and it is younger than ``ttl`` seconds. Each worker process
+    keeps its own cache; the version stamp lives in the database, so a change
+    made by any process invalidates every process's entries.
+    """
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key, version, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == version and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[2]
+        value = loader()
+        with self._lock:
+            self._entries[key] = (version, now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def read_catalog_version(session):
+    """The shared catalog version, bumped by triggers on doctors and departments."""
+    return session.execute(text(
+        "SELECT value FROM counters WHERE entity = 'catalog' AND status = 'version'")).scalar() or 0
+
+
+def _department_entry(department):
+    return DepartmentEntry(department.id, department.name, department.description)
+
+
+def load_departments():
+    return [_department_entry(d) for d in Department.query.order_by(Department.id)]
+
+
+def load_doctors(department_id=None):
+    query = eager(Doctor.query, 'department')
+    if department_id:
+        query = query.filter(Doctor.department_id == department_id)
+    return [DoctorEntry(d.id, d.name, d.phone, d.qualification, d.experience_years, d.consultation_fee,
+                        d.department_id, _department_entry(d.department))
+            for d in query.order_by(Doctor.id)]
+
+
+def load_department_stats(session, today, week_end):
+    """Per-department doctor and booking counts from grouped aggregates.
+
+    Five queries regardless of how many departments, doctors or bookings
+    there are: one GROUP BY over departments/doctors/users, one over upcoming
+    bookings, two for the week's availability expansion and one GROUP BY over
+    the doctors it found.
+    """
+    rows = session.query(
+        Department.id,
+        Department.name,
+        Department.description,
+        func.count(Doctor.id),
+        func.count(case((User.is_active == True, Doctor.id)))
+    ).outerjoin(Doctor, Doctor.department_id == Department.id).outerjoin(
+        User, User.id == Doctor.user_id
+    ).group_by(Department.id).order_by(Department.id).all()
+
+    upcoming = dict(session.query(Doctor.department_id, func.count(Appointment.id)).join(
+        Appointment, Appointment.doctor_id == Doctor.id
+    ).filter(
+        Appointment.status == 'Booked',
+        Appointment.appointment_date >= today
+    ).group_by(Doctor.department_id).all())
+
+    available_ids = {o.doctor_id for o in expand_availability(today, week_end)}
+    available = dict(session.query(Doctor.department_id, func.count(Doctor.id)).filter(
+        Doctor.id.in_(available_ids)
+    ).group_by(Doctor.department_id).all()) if available_ids else {}
+
+    return [{
+        'id': department_id,
+        'name': name,
+        'description': description,
+        'doctor_count': doctor_count,
+        'active_doctor_count': active_count,
+        'available_this_week': available.get(department_id, 0),
+        'upcoming_bookings': upcoming.get(department_id, 0)
+    } for department_id, name, description, doctor_count, active_count in rows]
@@ -0,0 +1,122 @@
+from sqlalchemy import text
+
+
+def _bump(entity, status, delta):
+    return (f"INSERT INTO counters(entity, status, value) VALUES ('{entity}', {status}, {delta}) "
+            f"ON CONFLICT(entity, status) DO UPDATE SET value = value + excluded.value;")
+
+
+# Triggers run inside the writing statement's transaction, so every register,
+# add doctor, book, cancel, complete and delete moves its counters atomically.
+_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS doctors_count_ai AFTER INSERT ON doctors BEGIN
+            {_bump('doctors', "''", 1)}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS doctors_count_ad AFTER DELETE ON doctors BEGIN
+            {_bump('doctors', "''", -1)}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_count_ai AFTER INSERT ON patients BEGIN
+            {_bump('patients', "''", 1)}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS patients_count_ad AFTER DELETE ON patients BEGIN
+            {_bump('patients', "''", -1)}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS appointments_count_ai AFTER INSERT ON appointments BEGIN
+            {_bump('appointments', "''", 1)}
+            {_bump('appointments', "COALESCE(new.status, '')", 1)}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS appointments_count_au AFTER UPDATE OF status ON appointments
+        WHEN old.status IS NOT new.status BEGIN
+            {_bump('appointments', "COALESCE(old.status, '')", -1)}
+            {_bump('appointments', "COALESCE(new.status, '')", 1)}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS appointments_count_ad AFTER DELETE ON appointments BEGIN
+            {_bump('appointments', "''", -1)}
+            {_bump('appointments', "COALESCE(old.status, '')", -1)}
+        END""",
+]
+
+def _bump_catalog(table, event):
+    return f"""CREATE TRIGGER IF NOT EXISTS {table}_catalog_a{event[0].lower()} AFTER {event} ON {table} BEGIN
+            {_bump('catalog', "'version'", 1)}
+        END"""
+
+
+# Any change to the doctor or department catalog bumps the shared version stamp
+# that invalidates every worker's catalog cache (see services/catalog.py).
+_TRIGGERS += [_bump_catalog(table, event)
+              for table in ('doctors', 'departments')
+              for event in ('INSERT', 'UPDATE', 'DELETE')]
+_TRIGGERS.append(f"""CREATE TRIGGER IF NOT EXISTS users_catalog_au AFTER UPDATE OF is_active ON users
+        WHEN new.role = 'doctor' BEGIN
+            {_bump('catalog', "'version'", 1)}
+        END""")
+
+def _bump_availability(table, event):
+    row = 'old' if event == 'DELETE' else 'new'
+    return f"""CREATE TRIGGER IF NOT EXISTS {table}_version_a{event[0].lower()} AFTER {event} ON {table} BEGIN
+            {_bump('availability', f"CAST({row}.doctor_id AS TEXT)", 1)}
+        END"""
+
+
+# Per-doctor availability version, used for the availability API's ETag.
+_TRIGGERS += [_bump_availability(table, event)
+              for table in ('doctor_availability', 'weekly_availability')
+              for event in ('INSERT', 'UPDATE', 'DELETE')]
+
+def _bump_schedule(table, event):
+    return f"""CREATE TRIGGER IF NOT EXISTS {table}_schedule_a{event[0].lower()} AFTER {event} ON {table} BEGIN
+            {_bump('schedule', "'version'", 1)}
+        END"""
+
+
+# Global schedule version: bumped by bookings, status changes and availability
+# edits. Versions derived department stats such as upcoming bookings.
+_TRIGGERS += [_bump_schedule(table, event)
+              for table in ('appointments', 'doctor_availability', 'weekly_availability')
+              for event in ('INSERT', 'UPDATE', 'DELETE')]
+
+_RECONCILE = [
+    "DELETE FROM counters WHERE entity IN ('doctors', 'patients', 'appointments')",
+    "INSERT INTO counters(entity, status, value) SELECT 'doctors', '', COUNT(*) FROM doctors",
+    "INSERT INTO counters(entity, status, value) SELECT 'patients', '', COUNT(*) FROM patients",
+    "INSERT INTO counters(entity, status, value) SELECT 'appointments', '', COUNT(*) FROM appointments",
+    """INSERT INTO counters(entity, status, value)
+       SELECT 'appointments', COALESCE(status, ''), COUNT(*) FROM appointments
+       GROUP BY COALESCE(status, '') HAVING COALESCE(status, '') != ''""",
+]
+
+
+def setup_counters(engine):
+    """Install the counter triggers; seed the counters if they have never been filled."""
+    with engine.begin() as conn:
+        seeded = conn.execute(text("SELECT 1 FROM counters LIMIT 1")).first() is not None
+        for statement in _TRIGGERS:
+            conn.execute(text(statement))
+        if not seeded:
+            for statement in _RECONCILE:
+                conn.execute(text(statement))
+
+
+def reconcile_counters(engine):
+    """Rebuild every counter from COUNT(*) over the base tables."""
+    with engine.begin() as conn:
+        for statement in _RECONCILE:
+            conn.execute(text(statement))
+
+
+def read_schedule_version(session):
+    return session.execute(text(
+        "SELECT value FROM counters WHERE entity = 'schedule' AND status = 'version'")).scalar() or 0
+
+
+def read_availability_version(session, doctor_id):
+    return session.execute(text(
+        "SELECT value FROM counters WHERE entity = 'availability' AND status = :doctor_id"
+    ), {'doctor_id': str(doctor_id)}).scalar() or 0
+
+
+def read_counters(session):
+    """Return ``{(entity, status): value}`` for all counters in one query."""
+    rows = session.execute(text("SELECT entity, status, value FROM counters"))
+    return {(entity, status): value for entity, status, value in rows}
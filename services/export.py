@@ -0,0 +1,104 @@
+"""Bulk export of appointments with their patient, doctor, department and treatment.
+
+Rows are read through a streaming cursor ``chunk_size`` at a time and written
+out as they arrive, so an export of millions of rows uses the same memory as
+one of ten.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from sqlalchemy import select
+from models import Appointment, Department, Doctor, Patient, Treatment
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+EXPORT_COLUMNS = [
+    ('appointment_id', Appointment.id),
+    ('appointment_date', Appointment.appointment_date),
+    ('appointment_time', Appointment.appointment_time),
+    ('status', Appointment.status),
+    ('reason', Appointment.reason),
+    ('created_at', Appointment.created_at),
+    ('patient_id', Patient.id),
+    ('patient_name', Patient.name),
+    ('patient_phone', Patient.phone),
+    ('doctor_id', Doctor.id),
+    ('doctor_name', Doctor.name),
+    ('department', Department.name),
+    ('diagnosis', Treatment.diagnosis),
+    ('prescription', Treatment.prescription),
+    ('treatment_notes', Treatment.notes),
+    ('follow_up_date', Treatment.follow_up_date),
+]
+
+
+def export_statement(start=None, end=None, status=None):
+    """SELECT for the export, ordered on the (appointment_date, id) index."""
+    stmt = select(*[column.label(name) for name, column in EXPORT_COLUMNS]).select_from(Appointment).join(
+        Patient, Patient.id == Appointment.patient_id
+    ).join(
+        Doctor, Doctor.id == Appointment.doctor_id
+    ).outerjoin(
+        Department, Department.id == Doctor.department_id
+    ).outerjoin(
+        Treatment, Treatment.appointment_id == Appointment.id
+    )
+    if start:
+        stmt = stmt.where(Appointment.appointment_date >= start)
+    if end:
+        stmt = stmt.where(Appointment.appointment_date <= end)
+    if status:
+        stmt = stmt.where(Appointment.status == status)
+    return stmt.order_by(Appointment.appointment_date, Appointment.id)
+
+
+def export_rows(session, start=None, end=None, status=None, chunk_size=1000):
+    """Yield export rows as tuples, fetching ``chunk_size`` at a time."""
+    result = session.execute(export_statement(start, end, status).execution_options(
+        stream_results=True, yield_per=chunk_size))
+    try:
+        for row in result:
+            yield tuple(row)
+    finally:
+        result.close()
+
+
+def _text(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def write_csv(rows, chunk_size=1000):
+    """Yield CSV text, header first, in blocks of about ``chunk_size`` rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_text(value) for value in row])
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def write_ndjson(rows, chunk_size=1000):
+    """Yield one JSON object per line, in blocks of about ``chunk_size`` rows."""
+    names = [name for name, _ in EXPORT_COLUMNS]
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(names, map(_text, row))), separators=(',', ':')))
+        if len(lines) == chunk_size:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def export_appointments(session, fmt='csv', start=None, end=None, status=None, chunk_size=1000):
+    """Export text chunks in ``fmt`` ('csv' or 'ndjson')."""
+    rows = export_rows(session, start, end, status, chunk_size)
+    writer = write_ndjson if fmt == 'ndjson' else write_csv
+    return writer(rows, chunk_size)
@@ -0,0 +1,81 @@
+"""The logged-in user, resolved once and kept as plain values.
+
+Routes only need the user's id, role and doctor/patient profile id, so one
+joined query builds an Identity and the signed session can carry it for a
+short TTL. Within the TTL an authenticated request needs no identity queries
+at all. Edits such as deactivation or a role change take effect when the
+TTL runs out, or at once for the user's own session if the caller calls
+forget_identity.
+"""
+import time
+from flask_login import UserMixin
+from models import Doctor, Patient, User
+
+SESSION_KEY = 'identity'
+
+
+class Identity(UserMixin):
+    """Stands in for User as flask-login's ``current_user``."""
+
+    def __init__(self, id, email, role, active=True, name=None, profile_id=None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.active = active
+        self.name = name
+        self.profile_id = profile_id
+
+    @property
+    def is_active(self):
+        return self.active
+
+    @property
+    def doctor_id(self):
+        return self.profile_id if self.role == 'doctor' else None
+
+    @property
+    def patient_id(self):
+        return self.profile_id if self.role == 'patient' else None
+
+    def to_session(self, ttl):
+        return {'id': self.id, 'email': self.email, 'role': self.role, 'active': self.active,
+                'name': self.name, 'profile_id': self.profile_id, 'expires': time.time() + ttl}
+
+    @classmethod
+    def from_session(cls, data, user_id):
+        """Identity from a session entry, or None if it is for another user or expired."""
+        if not data or data.get('id') != user_id or data.get('expires', 0) < time.time():
+            return None
+        return cls(data['id'], data['email'], data['role'], data['active'], data['name'], data['profile_id'])
+
+
+def load_identity(session, user_id):
+    """One query for the user and its doctor or patient profile, or None."""
+    row = session.query(
+        User.id, User.email, User.role, User.is_active,
+        Doctor.id, Doctor.name, Patient.id, Patient.name
+    ).outerjoin(Doctor, Doctor.user_id == User.id).outerjoin(
+        Patient, Patient.user_id == User.id
+    ).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    user_id, email, role, is_active, doctor_id, doctor_name, patient_id, patient_name = row
+    if role == 'doctor':
+        return Identity(user_id, email, role, is_active, doctor_name, doctor_id)
+    if role == 'patient':
+        return Identity(user_id, email, role, is_active, patient_name, patient_id)
+    return Identity(user_id, email, role, is_active)
+
+
+def resolve_identity(db_session, flask_session, user_id, ttl):
+    """Identity for ``user_id``: from the signed session while fresh, else from the database."""
+    identity = Identity.from_session(flask_session.get(SESSION_KEY), user_id) if ttl else None
+    if identity is None:
+        identity = load_identity(db_session, user_id)
+        if identity is not None and ttl:
+            flask_session[SESSION_KEY] = identity.to_session(ttl)
+    return identity
+
+
+def forget_identity(flask_session):
+    flask_session.pop(SESSION_KEY, None)
@@ -0,0 +1,148 @@
+"""Bulk CSV import of patients and doctors.
+
+Rows are validated, then created in batches: one duplicate-email query, one
+round of password hashing spread over a process pool (an import may use every
+core, unlike PasswordHasher's capped pool), one multi-row INSERT for users and
+one for profiles, and one commit. A bad row is reported with its line number
+and skipped; it never aborts the rest of its batch.
+"""
+import csv
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from models import Department, Doctor, Patient, User
+
+ImportResult = namedtuple('ImportResult', ['created', 'errors'])
+
+IMPORT_COLUMNS = {
+    'patient': ['email', 'password', 'name', 'phone', 'dob', 'gender', 'address', 'emergency_contact', 'blood_group'],
+    'doctor': ['email', 'password', 'name', 'phone', 'department', 'qualification', 'experience_years',
+               'consultation_fee'],
+}
+
+
+def _hash(args):
+    password, method = args
+    return generate_password_hash(password, method=method)
+
+
+def _clean(value):
+    value = (value or '').strip()
+    return value or None
+
+
+def validate_row(role, row, departments):
+    """Return ``(user, profile)`` column dicts for one CSV row, or raise ValueError.
+
+    ``departments`` maps lower-cased department names and id strings to ids.
+    """
+    email = _clean(row.get('email')) or ''
+    password = row.get('password') or ''
+    name = _clean(row.get('name'))
+    if '@' not in email:
+        raise ValueError('a valid email is required')
+    if len(password) < 6:
+        raise ValueError('password must be at least 6 characters')
+    if not name:
+        raise ValueError('name is required')
+
+    user = {'email': email, 'password': password, 'role': role, 'is_active': True,
+            'created_at': datetime.utcnow()}
+    profile = {'name': name, 'phone': _clean(row.get('phone')), 'created_at': user['created_at']}
+
+    if role == 'patient':
+        dob = _clean(row.get('dob'))
+        try:
+            profile['date_of_birth'] = datetime.strptime(dob, '%Y-%m-%d').date() if dob else None
+        except ValueError:
+            raise ValueError('dob must be in YYYY-MM-DD format')
+        for field in ('gender', 'address', 'emergency_contact', 'blood_group'):
+            profile[field] = _clean(row.get(field))
+    else:
+        department = (_clean(row.get('department')) or '').lower()
+        if department not in departments:
+            raise ValueError(f"unknown department {row.get('department')!r}")
+        profile['department_id'] = departments[department]
+        profile['qualification'] = _clean(row.get('qualification'))
+        try:
+            profile['experience_years'] = int(_clean(row.get('experience_years')) or 0)
+            profile['consultation_fee'] = float(_clean(row.get('consultation_fee')) or 0)
+        except ValueError:
+            raise ValueError('experience_years and consultation_fee must be numbers')
+    return user, profile
+
+
+def _import_batch(session, role, batch, pool, chunksize, method, errors):
+    emails = [user['email'] for _, user, _ in batch]
+    taken = {email for (email,) in session.query(User.email).filter(User.email.in_(emails))}
+    fresh = []
+    for line, user, profile in batch:
+        if user['email'] in taken:
+            errors.append((line, f"email {user['email']} is already registered"))
+        else:
+            fresh.append((line, user, profile))
+    if not fresh:
+        return 0
+
+    jobs = [(user['password'], method) for _, user, _ in fresh]
+    if pool is None:
+        hashes = list(map(_hash, jobs))
+    else:
+        hashes = list(pool.map(_hash, jobs, chunksize=chunksize))
+    users = [dict(user, password=hashed) for (_, user, _), hashed in zip(fresh, hashes)]
+
+    ids = dict(session.execute(insert(User).returning(User.email, User.id), users).all())
+    model = Patient if role == 'patient' else Doctor
+    session.execute(insert(model), [dict(profile, user_id=ids[user['email']]) for _, user, profile in fresh])
+    session.commit()
+    return len(fresh)
+
+
+def import_users(session, role, lines, batch_size=1000, workers=None, method='pbkdf2:sha256'):
+    """Create ``role`` ('patient' or 'doctor') accounts from CSV ``lines``.
+
+    ``lines`` is any iterable of CSV text lines with a header row (an open file
+    works). ``workers`` is the hashing process count: None for one per CPU, 1
+    to hash in this process. Returns an ImportResult of the created count and
+    ``(line_number, message)`` errors.
+    """
+    departments = {}
+    if role == 'doctor':
+        for department_id, name in session.query(Department.id, Department.name):
+            departments[name.lower()] = department_id
+            departments[str(department_id)] = department_id
+
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    chunksize = max(1, batch_size // (workers * 4))
+    created = 0
+    errors = []
+    seen = set()
+    batch = []
+    try:
+        reader = csv.DictReader(lines)
+        for row in reader:
+            line = reader.line_num
+            try:
+                user, profile = validate_row(role, row, departments)
+            except ValueError as e:
+                errors.append((line, str(e)))
+                continue
+            if user['email'] in seen:
+                errors.append((line, f"email {user['email']} appears more than once in the file"))
+                continue
+            seen.add(user['email'])
+            batch.append((line, user, profile))
+            if len(batch) == batch_size:
+                created += _import_batch(session, role, batch, pool, chunksize, method, errors)
+                batch = []
+        if batch:
+            created += _import_batch(session, role, batch, pool, chunksize, method, errors)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    errors.sort()
+    return ImportResult(created, errors)
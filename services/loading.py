@@ -0,0 +1,26 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+
+def eager(query, *paths):
+    """Load the dotted relationship ``paths`` (e.g. ``'doctor.department'``) up front.
+
+    Many-to-one and one-to-one hops are joined into the main SELECT; collections
+    get one extra ``SELECT ... WHERE id IN (...)`` each. Either way the number of
+    queries is fixed by ``paths``, not by the number of rows.
+    """
+    entity = query.column_descriptions[0]['entity']
+    for path in paths:
+        mapper = inspect(entity)
+        option = None
+        for name in path.split('.'):
+            prop = mapper.relationships[name]
+            attr = getattr(mapper.class_, name)
+            loader = selectinload if prop.uselist else joinedload
+            if option is None:
+                option = loader(attr)
+            else:
+                option = getattr(option, loader.__name__)(attr)
+            mapper = prop.mapper
+        query = query.options(option)
+    return query
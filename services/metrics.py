@@ -0,0 +1,199 @@
+"""Counters, gauges and histograms rendered in the Prometheus text format.
+
+Recording takes no lock: each thread writes to its own shard (a plain dict)
+and a scrape sums the shards. Shards of finished threads are folded into one
+retired dict whenever a new thread registers, so a thread-per-request server
+does not grow the list without bound.
+
+With ``directory`` set, each process writes its totals to
+``<directory>/<pid>.json`` at most every ``flush_interval`` seconds, and
+render() adds up every file in the directory. Counters and histograms include
+processes that have exited. Gauges only count live ones. Empty the directory
+when the deployment starts.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metrics:
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._types = {}
+        self._collectors = []
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}
+        self._lock = threading.Lock()
+        self._flushed_at = 0.0
+        self._flushed_pid = None
+
+    def counter(self, name, help):
+        self._types[name] = ('counter', help, None)
+
+    def gauge(self, name, help):
+        self._types[name] = ('gauge', help, None)
+
+    def histogram(self, name, help, buckets=DEFAULT_BUCKETS):
+        self._types[name] = ('histogram', help, tuple(buckets))
+
+    def collector(self, f):
+        """Register ``f() -> [(gauge_name, labels_dict, value)]``, called on every snapshot."""
+        self._collectors.append(f)
+        return f
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                if len(self._shards) >= 64:
+                    self._retire()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire(self):
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._retired, shard)
+        self._shards = live
+
+    def inc(self, name, amount=1, **labels):
+        shard = self._shard()
+        key = (name, _labels(labels))
+        shard[key] = shard.get(key, 0) + amount
+
+    def dec(self, name, amount=1, **labels):
+        self.inc(name, -amount, **labels)
+
+    def observe(self, name, value, **labels):
+        buckets = self._types[name][2]
+        shard = self._shard()
+        key = (name, _labels(labels))
+        counts = shard.get(key)
+        if counts is None:
+            # one slot per bucket plus +Inf, then sum
+            counts = shard[key] = [0] * (len(buckets) + 1) + [0.0]
+        counts[bisect_left(buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self, into, shard):
+        for key, value in list(shard.items()):
+            if isinstance(value, list):
+                total = into.get(key)
+                into[key] = list(value) if total is None else [a + b for a, b in zip(total, value)]
+            else:
+                into[key] = into.get(key, 0) + value
+
+    def snapshot(self):
+        """This process's values: ``{(name, labels): number or bucket list}``."""
+        with self._lock:
+            self._retire()
+            totals = {}
+            self._merge(totals, self._retired)
+            for _, shard in self._shards:
+                self._merge(totals, shard)
+        for f in self._collectors:
+            for name, labels, value in f():
+                totals[(name, _labels(labels))] = value
+        return totals
+
+    def flush(self, force=False):
+        """Write this process's snapshot to the shared directory if one is due."""
+        if not self.directory:
+            return
+        pid = os.getpid()
+        now = time.monotonic()
+        if not force and pid == self._flushed_pid and now - self._flushed_at < self.flush_interval:
+            return
+        self._flushed_at, self._flushed_pid = now, pid
+        rows = [[name, list(labels), value] for (name, labels), value in self.snapshot().items()]
+        path = os.path.join(self.directory, f'{pid}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(rows, f)
+        os.replace(path + '.tmp', path)
+
+    def _aggregate(self):
+        totals = self.snapshot()
+        if not self.directory:
+            return totals
+        self.flush(force=True)
+        own = f'{os.getpid()}.json'
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    rows = json.load(f)
+            except (OSError, ValueError):
+                continue
+            alive = _pid_alive(int(filename[:-5]))
+            other = {}
+            for name, labels, value in rows:
+                kind = self._types.get(name, ('gauge',))[0]
+                if kind != 'gauge' or alive:
+                    other[(name, tuple(tuple(pair) for pair in labels))] = value
+            self._merge(totals, other)
+        return totals
+
+    def render(self):
+        """Every registered metric in the Prometheus text exposition format."""
+        by_name = {}
+        for (name, labels), value in self._aggregate().items():
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, help, buckets) in self._types.items():
+            lines.append(f'# HELP {name} {help}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter' and name not in by_name:
+                lines.append(f'{name} 0')
+            for labels, value in sorted(by_name.get(name, [])):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), value):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", le)])} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,67 @@
+from sqlalchemy import UniqueConstraint, inspect, text
+from sqlalchemy.schema import CreateTable
+
+
+def create_missing_indexes(engine, metadata):
+    """Create every index declared on ``metadata`` that the database lacks.
+
+    ``db.create_all()`` skips tables that already exist, so indexes added to the
+    models later never reach an existing ``hospital.db``. This builds only the
+    indexes (``CREATE INDEX``), leaving table data untouched, then refreshes the
+    planner statistics. Returns the names of the indexes created.
+    """
+    inspector = inspect(engine)
+    created = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                index.create(bind=engine)
+                created.append(index.name)
+    if created:
+        with engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+    return created
+
+
+def drop_stale_unique_constraints(engine, metadata):
+    """Rebuild SQLite tables that still carry a UNIQUE constraint the models dropped.
+
+    SQLite cannot drop a table constraint, so the rows are copied into a fresh
+    table built from the model, the old table is dropped and the copy renamed
+    into place, all in one transaction. Indexes and triggers go with the old
+    table; run create_missing_indexes and the trigger setup afterwards. Returns
+    the names of the tables rebuilt.
+    """
+    if engine.dialect.name != 'sqlite':
+        return []
+    inspector = inspect(engine)
+    rebuilt = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        declared = {tuple(column.name for column in constraint.columns)
+                    for constraint in table.constraints if isinstance(constraint, UniqueConstraint)}
+        stored = [tuple(uc['column_names']) for uc in inspector.get_unique_constraints(table.name)]
+        if all(columns in declared for columns in stored):
+            continue
+        name = engine.dialect.identifier_preparer.format_table(table)
+        copy = f'"{table.name}_rebuild"'
+        ddl = str(CreateTable(table).compile(dialect=engine.dialect)).replace(
+            f'CREATE TABLE {name} ', f'CREATE TABLE {copy} ', 1)
+        columns = ', '.join(f'"{column.name}"' for column in table.columns)
+        with engine.connect() as conn:
+            # pysqlite only opens a transaction before DML; an explicit BEGIN takes the
+            # DDL in too, so a failed copy leaves neither the old table dropped nor a
+            # half-built copy behind
+            conn.exec_driver_sql('BEGIN')
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS {copy}')
+            conn.exec_driver_sql(ddl)
+            conn.exec_driver_sql(f'INSERT INTO {copy} ({columns}) SELECT {columns} FROM {name}')
+            conn.exec_driver_sql(f'DROP TABLE {name}')
+            conn.exec_driver_sql(f'ALTER TABLE {copy} RENAME TO {name}')
+            conn.commit()
+        rebuilt.append(table.name)
+    return rebuilt
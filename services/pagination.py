@@ -0,0 +1,116 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query plus the cursors around it."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None, per_page=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _serialize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _deserialize(column, value):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values):
+    raw = json.dumps([_serialize(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """Return the cursor values typed for ``columns``, or None if malformed."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(columns):
+            return None
+        return [_deserialize(c, v) for c, v in zip(columns, values)]
+    except (ValueError, TypeError):
+        return None
+
+
+def _seek_condition(columns, values, forward):
+    # Expands (c1, c2, ...) > (v1, v2, ...) so SQLite can walk the index.
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        step = column > values[i] if forward else column < values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def keyset_filter(query, columns, after=None, descending=False):
+    """Order ``query`` on ``columns`` and skip everything up to the ``after`` cursor."""
+    after_values = decode_cursor(after, columns)
+    if after_values is not None:
+        query = query.filter(_seek_condition(columns, after_values, forward=not descending))
+    return query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+
+def keyset_paginate(query, columns, after=None, before=None, per_page=25, descending=False):
+    """Paginate ``query`` on ``columns`` (the last one must be unique, e.g. id).
+
+    ``after`` / ``before`` are cursors from a previous page's ``next_cursor`` /
+    ``prev_cursor``. Only ``per_page + 1`` rows are ever fetched.
+    """
+    after_values = decode_cursor(after, columns)
+    before_values = decode_cursor(before, columns) if after_values is None else None
+    backwards = before_values is not None
+
+    # Walking backwards means flipping both the seek direction and the order.
+    ascending = descending == backwards
+    if after_values is not None:
+        query = query.filter(_seek_condition(columns, after_values, forward=not descending))
+    elif backwards:
+        query = query.filter(_seek_condition(columns, before_values, forward=descending))
+    query = query.order_by(*[c.asc() if ascending else c.desc() for c in columns])
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(item):
+        return encode_cursor([getattr(item, c.key) for c in columns])
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if (has_more and not backwards) or backwards:
+            next_cursor = cursor_for(rows[-1])
+        if (has_more and backwards) or after_values is not None:
+            prev_cursor = cursor_for(rows[0])
+    return KeysetPage(rows, next_cursor=next_cursor, prev_cursor=prev_cursor, per_page=per_page)
@@ -0,0 +1,85 @@
+"""Password hashing off the request thread.
+
+pbkdf2 and scrypt spend nearly all their time inside hashlib, which releases
+the GIL, so a small thread pool is enough to cap how many cores logins can
+take at once. Requests that need a hash wait their turn; every other route
+keeps the remaining cores.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasher:
+    """Hash and verify passwords on at most ``workers`` threads.
+
+    ``method`` is a werkzeug method string such as ``pbkdf2:sha256`` (werkzeug's
+    current default iterations) or ``pbkdf2:sha256:1000000``. Hashes stored
+    with other parameters still verify, and needs_rehash tells the caller to
+    upgrade the ones that are weaker.
+
+    The pool is started on first use and again in each forked child: threads
+    do not survive fork, so a pool inherited from a parent that already used
+    it (gunicorn --preload) would never run anything.
+    """
+
+    def __init__(self, method='pbkdf2:sha256', workers=2):
+        self.method = method
+        self.workers = workers
+        self._pool = None
+        self._pool_pid = None
+        self._prefix = None
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The parent's lock may have been held by a thread that no longer exists
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        pid = os.getpid()
+        if self._pool_pid != pid:
+            with self._lock:
+                if self._pool_pid != pid:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+                    self._pool_pid = pid
+        return self._pool
+
+    def hash(self, password):
+        return self._executor().submit(generate_password_hash, password, method=self.method).result()
+
+    def verify(self, stored, password):
+        return self._executor().submit(check_password_hash, stored, password).result()
+
+    def needs_rehash(self, stored):
+        """True if ``stored`` uses another algorithm or a lower cost than ``method``.
+
+        A hash that is stronger than configured (say 1,000,000 pbkdf2
+        iterations against a configured 600,000) is left alone.
+        """
+        try:
+            algorithm, cost = _split_method(stored.split('$', 1)[0])
+        except ValueError:
+            return True
+        wanted_algorithm, wanted_cost = _split_method(self._method_prefix())
+        if algorithm != wanted_algorithm or len(cost) != len(wanted_cost):
+            return True
+        return any(have < want for have, want in zip(cost, wanted_cost))
+
+    def _method_prefix(self):
+        # werkzeug fills in default parameters ('pbkdf2:sha256' ->
+        # 'pbkdf2:sha256:1000000'), so take the prefix from a real hash.
+        if self._prefix is None:
+            with self._lock:
+                if self._prefix is None:
+                    self._prefix = generate_password_hash('', method=self.method).split('$', 1)[0]
+        return self._prefix
+
+
+def _split_method(prefix):
+    """``'pbkdf2:sha256:600000'`` -> ``('pbkdf2:sha256', [600000])``; scrypt's n:r:p likewise."""
+    parts = prefix.split(':')
+    name_parts = 2 if parts[0] == 'pbkdf2' else 1
+    return ':'.join(parts[:name_parts]), [int(part) for part in parts[name_parts:]]
@@ -0,0 +1,71 @@
+"""A local read replica stand-in: a second SQLite file refreshed with the backup API.
+
+The backup API copies a consistent snapshot of the primary, and readers of
+the copy never block writers on the primary. A copy started at time ``t``
+contains every transaction committed before ``t``. ``synced_at`` records
+that start time, which is what staleness checks compare against.
+"""
+import logging
+import sqlite3
+import threading
+import time
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSync:
+    """Copies ``primary_uri`` over ``replica_uri`` every ``interval`` seconds on a daemon thread.
+
+    Either may be a URL object. Relative SQLite paths are taken as they are
+    (from the current directory), so pass ``engine.url`` of the engines the
+    app reads through rather than the URIs it was configured with.
+    """
+
+    def __init__(self, primary_uri, replica_uri, interval=5.0):
+        self.primary_path = make_url(primary_uri).database
+        self.replica_path = make_url(replica_uri).database
+        self.interval = interval
+        self.synced_at = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Take one snapshot now; returns the time it was taken."""
+        started = time.time()
+        source = sqlite3.connect(self.primary_path)
+        target = sqlite3.connect(self.replica_path, timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.synced_at = started
+        return started
+
+    def start(self):
+        """Start the sync thread unless it is already running."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='replica-sync', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except sqlite3.Error:
+                logger.exception('Replica sync failed; reads stay on the primary until it recovers')
+            self._stop.wait(self.interval)
+
+    def lag(self):
+        return time.time() - self.synced_at
+
+    def serves(self, max_lag, since=0.0):
+        """True if the replica is at most ``max_lag`` seconds old and includes everything up to ``since``."""
+        return self.synced_at > since and self.lag() <= max_lag
@@ -0,0 +1,117 @@
+import re
+from sqlalchemy import Float, Integer, column, select, table, text
+from sqlalchemy.exc import OperationalError
+
+# One FTS5 table per directory. rowid is the doctor/patient id, so a match can be
+# joined straight back onto the base table.
+SEARCH_TABLES = {
+    'doctors': table('doctor_search', column('rowid', Integer), column('rank', Float)),
+    'patients': table('patient_search', column('rowid', Integer), column('rank', Float)),
+}
+
+_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS doctor_search
+       USING fts5(name, department, qualification, prefix='2 3')""",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS patient_search
+       USING fts5(name, phone, prefix='2 3')""",
+    """CREATE TRIGGER IF NOT EXISTS doctor_search_ai AFTER INSERT ON doctors BEGIN
+           INSERT OR REPLACE INTO doctor_search(rowid, name, department, qualification)
+           SELECT new.id, new.name, d.name, new.qualification
+           FROM (SELECT 1) LEFT JOIN departments d ON d.id = new.department_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS doctor_search_au AFTER UPDATE ON doctors BEGIN
+           DELETE FROM doctor_search WHERE rowid = old.id;
+           INSERT INTO doctor_search(rowid, name, department, qualification)
+           SELECT new.id, new.name, d.name, new.qualification
+           FROM (SELECT 1) LEFT JOIN departments d ON d.id = new.department_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS doctor_search_ad AFTER DELETE ON doctors BEGIN
+           DELETE FROM doctor_search WHERE rowid = old.id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS department_search_au AFTER UPDATE OF name ON departments BEGIN
+           UPDATE doctor_search SET department = new.name
+           WHERE rowid IN (SELECT id FROM doctors WHERE department_id = new.id);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS patient_search_ai AFTER INSERT ON patients BEGIN
+           INSERT OR REPLACE INTO patient_search(rowid, name, phone) VALUES (new.id, new.name, new.phone);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS patient_search_au AFTER UPDATE ON patients BEGIN
+           DELETE FROM patient_search WHERE rowid = old.id;
+           INSERT INTO patient_search(rowid, name, phone) VALUES (new.id, new.name, new.phone);
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS patient_search_ad AFTER DELETE ON patients BEGIN
+           DELETE FROM patient_search WHERE rowid = old.id;
+       END""",
+]
+
+_REBUILD = [
+    "DELETE FROM doctor_search",
+    """INSERT INTO doctor_search(rowid, name, department, qualification)
+       SELECT doctors.id, doctors.name, departments.name, doctors.qualification
+       FROM doctors LEFT JOIN departments ON departments.id = doctors.department_id""",
+    "DELETE FROM patient_search",
+    """INSERT INTO patient_search(rowid, name, phone)
+       SELECT id, name, phone FROM patients""",
+]
+
+# engine url -> whether the FTS tables exist there
+_available = {}
+
+
+def setup_search_index(engine, rebuild=False):
+    """Create the FTS5 tables and sync triggers, filling them on first creation.
+
+    Returns False (and leaves the database untouched) when the engine is not
+    SQLite or its SQLite build lacks FTS5; searches then fall back to LIKE.
+    """
+    if engine.dialect.name != 'sqlite':
+        _available[str(engine.url)] = False
+        return False
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE name = 'doctor_search'")).first() is not None
+            for statement in _SCHEMA:
+                conn.execute(text(statement))
+            if rebuild or not exists:
+                for statement in _REBUILD:
+                    conn.execute(text(statement))
+    except OperationalError:
+        _available[str(engine.url)] = False
+        return False
+    _available[str(engine.url)] = True
+    return True
+
+
+def search_available(engine):
+    key = str(engine.url)
+    if key not in _available:
+        if engine.dialect.name != 'sqlite':
+            _available[key] = False
+        else:
+            with engine.connect() as conn:
+                _available[key] = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'doctor_search'")).first() is not None
+    return _available[key]
+
+
+def fts_query(search_query):
+    """Turn free text into an FTS5 prefix query: ``car jo`` -> ``"car"* "jo"*``."""
+    terms = re.findall(r'\w+', search_query)
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_matches(engine, directory, search_query):
+    """Return a ``(rowid, rank)`` subquery of matches, or None to fall back to LIKE.
+
+    ``rank`` is FTS5's bm25 score: lower is a better match.
+    """
+    if not search_available(engine):
+        return None
+    fts = SEARCH_TABLES[directory]
+    match = fts_query(search_query)
+    if not match:
+        return None
+    return (select(fts.c.rowid.label('id'), fts.c.rank)
+            .where(text(f'{fts.name} MATCH :match').bindparams(match=match))
+            .subquery())
@@ -0,0 +1,194 @@
+"""Synthetic data at realistic volumes, for benchmarks and load tests.
+
+Everything is written with multi-row Core INSERTs in ``batch_size`` chunks,
+using explicit ids past the current maximum, so existing data is left alone
+and memory stays flat however many rows are asked for. The same ``seed``
+always generates the same data. The triggers that maintain search,
+counters and versions fire as usual.
+"""
+import itertools
+import random
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select
+from models import Appointment, Department, Doctor, DoctorAvailability, Patient, Treatment, User, WeeklyAvailability
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Ananya', 'Diya', 'Ishaan', 'Kavya', 'Meera', 'Neha', 'Rohan',
+               'Saanvi', 'Arjun', 'Priya', 'Rahul', 'Sneha', 'Vikram', 'Pooja', 'Karan', 'Nisha', 'Amit']
+LAST_NAMES = ['Sharma', 'Verma', 'Gupta', 'Iyer', 'Reddy', 'Nair', 'Patel', 'Singh', 'Das', 'Menon',
+              'Kapoor', 'Joshi', 'Rao', 'Bose', 'Mehta', 'Pillai', 'Chopra', 'Kulkarni', 'Shah', 'Khan']
+QUALIFICATIONS = ['MBBS', 'MBBS, MD', 'MBBS, MS', 'MBBS, DNB', 'MBBS, MD, DM']
+DIAGNOSES = ['Viral fever', 'Hypertension', 'Migraine', 'Lower back pain', 'Dermatitis', 'Type 2 diabetes',
+             'Seasonal allergy', 'Sprained ankle', 'Gastritis', 'Routine check-up']
+REASONS = ['Follow-up', 'Fever and cough', 'Headache', 'Joint pain', 'Skin rash', 'General check-up', None]
+
+DAY_START = 9 * 60
+DAY_END = 17 * 60
+WORKDAYS = range(6)  # Monday to Saturday
+
+
+def _next_id(conn, model):
+    return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _insert(engine, model, rows, batch_size):
+    """Insert ``rows`` (any iterable of dicts) ``batch_size`` at a time, one transaction each."""
+    count = 0
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return count
+        with engine.begin() as conn:
+            conn.execute(model.__table__.insert(), batch)
+        count += len(batch)
+
+
+def _name(rng, prefix=''):
+    return f'{prefix}{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _schedule(rng, today, future_days, slot_minutes):
+    """Endless (date, time, future) slots for one doctor, newest first.
+
+    The working days inside the booking horizon are filled about 30%, so
+    slots are still free; earlier days are filled about 80%.
+    """
+    day = today + timedelta(days=future_days - 1)
+    while True:
+        if day.weekday() in WORKDAYS:
+            future = day >= today
+            fill = 0.3 if future else 0.8
+            for minutes in range(DAY_START, DAY_END, slot_minutes):
+                if rng.random() < fill:
+                    yield day, f'{minutes // 60:02d}:{minutes % 60:02d}', future
+        day -= timedelta(days=1)
+
+
+def seed_synthetic(engine, doctors=500, patients=200000, appointments=2000000, password_hash='!',
+                   seed=42, batch_size=5000, future_days=28, slot_minutes=15):
+    """Generate doctors (with weekly hours and a few days off), patients, appointments and treatments.
+
+    ``password_hash`` is stored for every generated account. Returns the
+    number of rows created per table.
+    """
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.utcnow()
+    with engine.connect() as conn:
+        user_id = _next_id(conn, User)
+        doctor_id = _next_id(conn, Doctor)
+        patient_id = _next_id(conn, Patient)
+        appointment_id = _next_id(conn, Appointment)
+        treatment_id = _next_id(conn, Treatment)
+        department_ids = list(conn.execute(select(Department.id)).scalars())
+    counts = {}
+
+    doctor_ids = range(doctor_id, doctor_id + doctors)
+    doctor_users = range(user_id, user_id + doctors)
+    patient_ids = range(patient_id, patient_id + patients)
+    patient_users = range(user_id + doctors, user_id + doctors + patients)
+
+    counts['users'] = _insert(engine, User, ({
+        'id': uid,
+        'email': f"seed-{'doctor' if uid < user_id + doctors else 'patient'}-{uid}@hms.test",
+        'password': password_hash,
+        'role': 'doctor' if uid < user_id + doctors else 'patient',
+        'is_active': rng.random() > 0.02,
+        'created_at': now
+    } for uid in range(user_id, user_id + doctors + patients)), batch_size)
+
+    counts['doctors'] = _insert(engine, Doctor, ({
+        'id': did,
+        'user_id': uid,
+        'department_id': department_ids[i % len(department_ids)],
+        'name': _name(rng, 'Dr. '),
+        'phone': f'9{rng.randrange(10 ** 9):09d}',
+        'qualification': rng.choice(QUALIFICATIONS),
+        'experience_years': rng.randrange(1, 35),
+        'consultation_fee': float(rng.randrange(300, 2000, 50)),
+        'created_at': now
+    } for i, (did, uid) in enumerate(zip(doctor_ids, doctor_users))), batch_size)
+
+    counts['patients'] = _insert(engine, Patient, ({
+        'id': pid,
+        'user_id': uid,
+        'name': _name(rng),
+        'phone': f'8{rng.randrange(10 ** 9):09d}',
+        'date_of_birth': today - timedelta(days=rng.randrange(365, 90 * 365)),
+        'gender': rng.choice(['Male', 'Female', 'Other']),
+        'blood_group': rng.choice(['A+', 'A-', 'B+', 'B-', 'O+', 'O-', 'AB+', 'AB-']),
+        'created_at': now
+    } for pid, uid in zip(patient_ids, patient_users)), batch_size)
+
+    counts['weekly_availability'] = _insert(engine, WeeklyAvailability, ({
+        'doctor_id': did,
+        'weekday': weekday,
+        'start_time': '09:00',
+        'end_time': '17:00',
+        'created_at': now
+    } for did in doctor_ids for weekday in WORKDAYS), batch_size)
+
+    counts['doctor_availability'] = _insert(engine, DoctorAvailability, ({
+        'doctor_id': did,
+        'date': day,
+        'start_time': '09:00',
+        'end_time': '17:00',
+        'is_available': False,
+        'created_at': now
+    } for did in doctor_ids
+        for day in sorted({today + timedelta(days=rng.randrange(future_days)) for _ in range(2)})), batch_size)
+
+    # Appointments are dealt out round-robin over doctors, each walking back
+    # through its own schedule, so (doctor, date, time) never repeats.
+    treatments = []
+
+    def appointment_rows():
+        schedules = [_schedule(random.Random(seed + did), today, future_days, slot_minutes) for did in doctor_ids]
+        for n in range(appointments):
+            did = doctor_ids[n % doctors]
+            day, time, future = next(schedules[n % doctors])
+            if future:
+                status = 'Cancelled' if rng.random() < 0.1 else 'Booked'
+            else:
+                status = rng.choices(['Completed', 'Cancelled', 'Booked'], [0.8, 0.15, 0.05])[0]
+            aid = appointment_id + n
+            if status == 'Completed':
+                treatments.append(aid)
+            created = datetime.combine(day, datetime.min.time()) - timedelta(days=rng.randrange(1, 30))
+            yield {
+                'id': aid,
+                'patient_id': rng.choice(patient_ids),
+                'doctor_id': did,
+                'appointment_date': day,
+                'appointment_time': time,
+                'status': status,
+                'reason': rng.choice(REASONS),
+                'created_at': created,
+                'updated_at': created
+            }
+
+    def treatment_rows():
+        # Drain the ids collected by appointment_rows batch by batch
+        while treatments:
+            aid = treatments.pop()
+            yield {
+                'id': treatment_id + aid - appointment_id,
+                'appointment_id': aid,
+                'diagnosis': rng.choice(DIAGNOSES),
+                'prescription': 'As discussed',
+                'created_at': now,
+                'updated_at': now
+            }
+
+    if not doctors or not patients:
+        return counts
+    counts['appointments'] = 0
+    counts['treatments'] = 0
+    rows = appointment_rows()
+    while True:
+        added = _insert(engine, Appointment, itertools.islice(rows, batch_size), batch_size)
+        if not added:
+            break
+        counts['appointments'] += added
+        counts['treatments'] += _insert(engine, Treatment, treatment_rows(), batch_size)
+    return counts
@@ -0,0 +1,112 @@
+from datetime import date, timedelta
+from sqlalchemy import delete, text
+from models import Appointment, Doctor, SlotBitmap
+from services.availability import expand_availability
+from services.slots import window_mask, times_mask, format_time
+
+
+def refresh_slot_index(session, start, end, slot_minutes, doctor_ids=None):
+    """Recompute the free-slot bitmaps for ``doctor_ids`` (None = all) over a date range.
+
+    Called after anything that changes which slots are open: a booking, a
+    cancellation or an availability save. The bitmaps are only a search index;
+    book_slot stays the authority on whether a slot can be taken. A refresh of
+    every doctor also records how far ahead the index reaches, so
+    earliest_slots can fill in days that have since entered the horizon.
+    """
+    taken = {}
+    query = session.query(Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time).filter(
+        Appointment.appointment_date >= start,
+        Appointment.appointment_date <= end,
+        Appointment.status != 'Cancelled'
+    )
+    if doctor_ids is not None:
+        query = query.filter(Appointment.doctor_id.in_(doctor_ids))
+    for doctor_id, day, time in query:
+        taken.setdefault((doctor_id, day), []).append(time)
+
+    rows = []
+    for opening in expand_availability(start, end, doctor_ids):
+        free = (window_mask(opening.start_time, opening.end_time, slot_minutes)
+                & ~times_mask(taken.get((opening.doctor_id, opening.date), ()), slot_minutes))
+        if free:
+            rows.append({'doctor_id': opening.doctor_id, 'date': opening.date, 'free_mask': format(free, 'x')})
+
+    stmt = delete(SlotBitmap).where(SlotBitmap.date >= start, SlotBitmap.date <= end)
+    if doctor_ids is not None:
+        stmt = stmt.where(SlotBitmap.doctor_id.in_(doctor_ids))
+    session.execute(stmt)
+    if rows:
+        session.execute(SlotBitmap.__table__.insert(), rows)
+    if doctor_ids is None:
+        session.execute(text(
+            "INSERT INTO counters(entity, status, value) VALUES ('slot_index', 'horizon', :end) "
+            "ON CONFLICT(entity, status) DO UPDATE SET value = max(value, excluded.value)"
+        ), {'end': end.toordinal()})
+    return len(rows)
+
+
+def indexed_through(session):
+    """Last date the index covers for every doctor, or None if it was never built."""
+    value = session.execute(text(
+        "SELECT value FROM counters WHERE entity = 'slot_index' AND status = 'horizon'")).scalar()
+    return date.fromordinal(value) if value else None
+
+
+def extend_slot_index(session, end, slot_minutes):
+    """Index the days from the recorded horizon up to ``end``; returns how many were added.
+
+    Fills from the day after the old horizon (today if the index was never
+    built), so no day between the two is skipped, in the caller's
+    transaction. Read the horizon and write the index on the same database:
+    a stale copy would both repeat the fill and rebuild bitmaps from stale
+    bookings.
+    """
+    covered = indexed_through(session)
+    if covered is not None and covered >= end:
+        return 0
+    first = covered + timedelta(days=1) if covered else date.today()
+    refresh_slot_index(session, first, end, slot_minutes)
+    return (end - first).days + 1
+
+
+def earliest_slots(session, department_id, start, end, slot_minutes, limit=10, not_before=None):
+    """Earliest open slots across a department as ``(date, time, doctor_id)`` tuples.
+
+    One indexed query streams the non-empty doctor-day bitmaps in date order.
+    Each day's candidates are read straight off the bits (lowest set bit
+    first) and the scan stops at the first day after ``limit`` slots are
+    found. ``not_before`` is a ``(date, minutes)`` cut-off for slots already
+    in the past today. Only reads the index; call extend_slot_index first
+    once the horizon may have rolled forward.
+    """
+    rows = session.query(SlotBitmap.date, SlotBitmap.doctor_id, SlotBitmap.free_mask).join(
+        Doctor, Doctor.id == SlotBitmap.doctor_id
+    ).filter(
+        Doctor.department_id == department_id,
+        SlotBitmap.date >= start,
+        SlotBitmap.date <= end
+    ).order_by(SlotBitmap.date).yield_per(500)
+
+    found = []
+    day_candidates = []
+    current_day = None
+    for day, doctor_id, free_mask in rows:
+        if day != current_day:
+            found.extend(sorted(day_candidates)[:limit - len(found)])
+            if len(found) >= limit:
+                break
+            day_candidates = []
+            current_day = day
+        mask = int(free_mask, 16)
+        if not_before and day == not_before[0]:
+            mask &= ~((1 << -(-not_before[1] // slot_minutes)) - 1)
+        wanted = limit - len(found)
+        while mask and wanted:
+            low = mask & -mask
+            day_candidates.append((day, low.bit_length() - 1, doctor_id))
+            mask ^= low
+            wanted -= 1
+    else:
+        found.extend(sorted(day_candidates)[:limit - len(found)])
+    return [(day, format_time(index * slot_minutes), doctor_id) for day, index, doctor_id in found]
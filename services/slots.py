@@ -0,0 +1,93 @@
+"""Discrete appointment slots.
+
+A doctor's day is cut into fixed-length slots counted from midnight, so slot
+``i`` starts at ``i * slot_minutes``. A set of slots is a plain int used as a
+bitmap (bit ``i`` set = slot ``i`` in the set), which makes "is this slot open"
+a shift-and-mask and "what is still free" a single ``window & ~taken``.
+"""
+
+
+def parse_time(value):
+    """Return minutes since midnight for ``'HH:MM'``, or None if malformed."""
+    try:
+        hours, minutes = value.split(':')[:2]
+        hours, minutes = int(hours), int(minutes)
+    except (AttributeError, ValueError):
+        return None
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        return None
+    return hours * 60 + minutes
+
+
+def format_time(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'
+
+
+def canonical_time(value):
+    """``'HH:MM'`` for any spelling parse_time accepts ('9:00', '09:00:00'), else None."""
+    minutes = parse_time(value)
+    return format_time(minutes) if minutes is not None else None
+
+
+def slot_index(value, slot_minutes):
+    """Slot number for a start time, or None if it is not on a slot boundary."""
+    minutes = parse_time(value)
+    if minutes is None or minutes % slot_minutes:
+        return None
+    return minutes // slot_minutes
+
+
+def window_mask(start_time, end_time, slot_minutes):
+    """Bitmap of the slots that fit entirely inside ``[start_time, end_time)``."""
+    start, end = parse_time(start_time), parse_time(end_time)
+    if start is None or end is None:
+        return 0
+    first = -(-start // slot_minutes)
+    last = end // slot_minutes
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def times_mask(times, slot_minutes):
+    mask = 0
+    for value in times:
+        index = slot_index(value, slot_minutes)
+        if index is not None:
+            mask |= 1 << index
+    return mask
+
+
+def mask_times(mask, slot_minutes):
+    """Start times (``'HH:MM'``) of the slots set in ``mask``, earliest first."""
+    times = []
+    index = 0
+    while mask:
+        if mask & 1:
+            times.append(format_time(index * slot_minutes))
+        mask >>= 1
+        index += 1
+    return times
+
+
+def is_open(start_time, end_time, value, slot_minutes):
+    """True if ``value`` is a slot start inside the availability window."""
+    index = slot_index(value, slot_minutes)
+    if index is None:
+        return False
+    return bool(window_mask(start_time, end_time, slot_minutes) >> index & 1)
+
+
+def free_slots(availability, taken, slot_minutes):
+    """Map each available date to its open slot times.
+
+    ``availability`` is an iterable of DoctorAvailability rows and ``taken`` maps
+    a date to the appointment times already holding a slot on that date.
+    """
+    slots = {}
+    for avail in sorted(availability, key=lambda a: a.date):
+        free = (window_mask(avail.start_time, avail.end_time, slot_minutes)
+                & ~times_mask(taken.get(avail.date, ()), slot_minutes))
+        if free:
+            slots[avail.date] = mask_times(free, slot_minutes)
+    return slots
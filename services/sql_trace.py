@@ -0,0 +1,119 @@
+"""Per-request SQL instrumentation.
+
+A SQLTracer listens on the engines' cursor events and adds every statement to
+the QueryLogs active in the current context. Each log keeps a count, the
+total time, the slowest few statements and how often each query *shape* ran.
+The shape is the statement with its literals and IN-lists collapsed, so the
+same lookup repeated once per row of a listing (the N+1 pattern) shows up as
+one shape with a high count. Logs nest: a budget around a test request sees
+the same statements as the request's own log.
+"""
+import heapq
+import logging
+import re
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+Statement = namedtuple('Statement', ['seconds', 'sql'])
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    """``sql`` with literals as ``?`` and ``(?, ?, ...)`` as ``(?)``."""
+    shape = _LITERALS.sub('?', sql)
+    shape = _IN_LISTS.sub('(?)', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryLog:
+    def __init__(self, label=None, keep=5):
+        self.label = label
+        self.keep = keep
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+        self._slowest = []
+
+    def record(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[query_shape(sql)] += 1
+        entry = (seconds, self.count, sql)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        elif seconds > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self):
+        return [Statement(seconds, sql) for seconds, _, sql in sorted(self._slowest, reverse=True)]
+
+    def repeated(self, threshold):
+        """``(shape, count)`` for every shape that ran at least ``threshold`` times, most first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def summary(self):
+        return f'{self.count} queries in {self.seconds * 1000:.1f}ms'
+
+
+class SQLTracer:
+    """Records statements into the active QueryLogs and logs slow ones.
+
+    ``slow_ms`` of None turns the slow-query log off.
+    """
+
+    def __init__(self, slow_ms=None, keep=5):
+        self.slow_ms = slow_ms
+        self.keep = keep
+        self._active = ContextVar('sql_trace_logs', default=())
+
+    def instrument(self, engine):
+        @event.listens_for(engine, 'before_cursor_execute')
+        def started(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('sql_trace_started', []).append(time.perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def finished(conn, cursor, statement, parameters, context, executemany):
+            seconds = time.perf_counter() - conn.info['sql_trace_started'].pop()
+            logs = self._active.get()
+            for log in logs:
+                log.record(statement, seconds)
+            if self.slow_ms is not None and seconds * 1000 >= self.slow_ms:
+                label = logs[-1].label if logs else None
+                logger.warning('slow query (%.1fms) in %s: %s', seconds * 1000, label or '-', _SPACE.sub(' ', statement))
+
+    def start(self, label=None):
+        """Begin recording into a new QueryLog in the current context."""
+        log = QueryLog(label, self.keep)
+        self._active.set(self._active.get() + (log,))
+        return log
+
+    def stop(self, log):
+        self._active.set(tuple(active for active in self._active.get() if active is not log))
+
+    def current(self):
+        logs = self._active.get()
+        return logs[-1] if logs else None
+
+    @contextmanager
+    def budget(self, max_queries, label=None):
+        """Raise QueryBudgetExceeded if the block runs more than ``max_queries`` statements."""
+        log = self.start(label)
+        try:
+            yield log
+        finally:
+            self.stop(log)
+        if log.count > max_queries:
+            raise QueryBudgetExceeded(f'{label or "block"} ran {log.summary()}, budget is {max_queries}; '
+                                      f'most repeated: {log.shapes.most_common(1)}')
@@ -0,0 +1,28 @@
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.py reads these at import time, so they are set before any test imports it
+os.environ['HMS_DATABASE_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='hms-tests-'), 'test.db')}"
+os.environ['HMS_PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app, init_db
+    app.config['TESTING'] = True
+    app.config['SQL_ENFORCE_BUDGETS'] = True
+    init_db()
+    return app
+
+
+def login_as(app, user_id):
+    """A test client whose session already belongs to ``user_id``."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
@@ -0,0 +1,23 @@
+"""The v2 streams reject cursors they cannot decode instead of starting over."""
+import base64
+import json
+import pytest
+
+
+def test_valid_cursor_is_accepted(app):
+    from services import encode_cursor
+    response = app.test_client().get(f'/api/v2/doctors?after={encode_cursor([0])}')
+    assert response.status_code == 200
+    assert 'items' in response.get_json()
+
+
+@pytest.mark.parametrize('cursor', [
+    'not-a-cursor!',
+    base64.urlsafe_b64encode(b'{"id": 1}').decode(),
+    base64.urlsafe_b64encode(json.dumps([1, 2]).encode()).decode(),
+    base64.urlsafe_b64encode(json.dumps(['abc']).encode()).decode(),
+])
+def test_bad_cursor_is_rejected(app, cursor):
+    response = app.test_client().get(f'/api/v2/doctors?after={cursor}')
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'invalid cursor'}
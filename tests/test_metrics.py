@@ -0,0 +1,39 @@
+"""Request metrics record the status actually sent, and /metrics is not public."""
+import pytest
+from conftest import login_as
+
+
+def requests_total(app, status):
+    from app import metrics
+    key = ('hms_http_requests_total',
+           (('endpoint', 'admin_appointments'), ('method', 'GET'), ('status', str(status))))
+    return metrics.snapshot().get(key, 0)
+
+
+@pytest.fixture
+def admin_id(app):
+    from models import User
+    with app.app_context():
+        return User.query.filter_by(role='admin').first().id
+
+
+def test_over_budget_request_is_counted_as_500(app, admin_id, monkeypatch):
+    from services import QueryBudgetExceeded
+    monkeypatch.setattr(app.view_functions['admin_appointments'], 'query_budget', 0)
+    ok, failed = requests_total(app, 200), requests_total(app, 500)
+    with pytest.raises(QueryBudgetExceeded):
+        login_as(app, admin_id).get('/admin/appointments')
+    assert requests_total(app, 500) == failed + 1
+    assert requests_total(app, 200) == ok
+
+
+@pytest.mark.parametrize('address, expected', [('127.0.0.1', 200), ('10.1.2.3', 403)])
+def test_metrics_answers_allowed_addresses(app, address, expected):
+    response = app.test_client().get('/metrics', environ_base={'REMOTE_ADDR': address})
+    assert response.status_code == expected
+
+
+def test_metrics_answers_admins_anywhere(app, admin_id):
+    response = login_as(app, admin_id).get('/metrics', environ_base={'REMOTE_ADDR': '10.1.2.3'})
+    assert response.status_code == 200
+    assert b'hms_http_requests_total' in response.data
@@ -0,0 +1,104 @@
+"""Listing pages run the same number of queries however many rows they show."""
+from datetime import date, timedelta
+import pytest
+from conftest import login_as
+
+LISTINGS = [
+    ('admin', '/admin/appointments?per_page=100'),
+    ('admin', '/admin/doctors?per_page=100'),
+    ('admin', '/admin/patients?per_page=100'),
+    ('doctor', '/doctor/dashboard'),
+    ('doctor', '/doctor/appointments'),
+    ('doctor', '/doctor/patient/{patient_id}/history'),
+    ('patient', '/patient/dashboard'),
+    ('patient', '/patient/appointments'),
+    ('patient', '/patient/history'),
+]
+
+
+def add_people(db, models, count, start):
+    """``count`` doctors and ``count`` patients, numbered from ``start``; returns their ids."""
+    doctors, patients = [], []
+    for i in range(start, start + count):
+        doctor_user = models.User(email=f'qc-doctor-{i}@hospital.com', password='x', role='doctor')
+        patient_user = models.User(email=f'qc-patient-{i}@hospital.com', password='x', role='patient')
+        db.session.add_all([doctor_user, patient_user])
+        db.session.flush()
+        doctor = models.Doctor(user_id=doctor_user.id, department_id=1 + i % 6, name=f'Dr. Count {i}')
+        patient = models.Patient(user_id=patient_user.id, name=f'Count Patient {i}')
+        db.session.add_all([doctor, patient])
+        db.session.flush()
+        doctors.append(doctor)
+        patients.append(patient)
+    db.session.commit()
+    return doctors, patients
+
+
+def add_appointments(db, models, doctor, patient, others, count, start):
+    """Past Completed visits with treatments, today's and upcoming Booked ones.
+
+    Rows rotate through ``doctor``/``patient`` and the ``others`` pairs, so
+    every listing shows many distinct people: a lazy load per row cannot hide
+    behind the identity map.
+    """
+    today = date.today()
+    for i in range(start, start + count):
+        other_doctor, other_patient = others[i // 4 % len(others)]
+        row_doctor = doctor if i % 4 < 2 else other_doctor
+        row_patient = patient if i % 2 == 0 else other_patient
+        day = today + timedelta(days=i % 21 - 10)
+        appointment = models.Appointment(
+            patient_id=row_patient.id, doctor_id=row_doctor.id, appointment_date=day,
+            appointment_time=f'{8 + i // 21 // 4:02d}:{i // 21 % 4 * 15:02d}',
+            status='Completed' if day < today else 'Booked', reason=f'Visit {i}')
+        db.session.add(appointment)
+        if day < today:
+            db.session.flush()
+            db.session.add(models.Treatment(appointment_id=appointment.id, diagnosis=f'Diagnosis {i}'))
+    db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def counts(app):
+    import models
+    from app import sql_tracer
+    from models import db
+
+    with app.app_context():
+        (doctor,), (patient,) = add_people(db, models, 1, 0)
+        others = list(zip(*add_people(db, models, 2, 1)))
+        add_appointments(db, models, doctor, patient, others, 8, 0)
+        users = {
+            'admin': models.User.query.filter_by(role='admin').first().id,
+            'doctor': doctor.user_id,
+            'patient': patient.user_id,
+        }
+        patient_id = patient.id
+    clients = {role: login_as(app, user_id) for role, user_id in users.items()}
+
+    def measure():
+        result = {}
+        for role, listing in LISTINGS:
+            url = listing.format(patient_id=patient_id)
+            clients[role].get(url)  # warm the catalog and identity caches
+            log = sql_tracer.start(url)
+            response = clients[role].get(url)
+            sql_tracer.stop(log)
+            assert response.status_code == 200, url
+            result[listing] = (log.count, len(response.get_data()))
+        return result
+
+    small = measure()
+    with app.app_context():
+        doctor, patient = db.session.get(models.Doctor, doctor.id), db.session.get(models.Patient, patient_id)
+        others = list(zip(*add_people(db, models, 60, 3)))
+        add_appointments(db, models, doctor, patient, others, 240, 8)
+    large = measure()
+    return {url: (small[url], large[url]) for url in small}
+
+
+@pytest.mark.parametrize('role,url', LISTINGS)
+def test_query_count_is_independent_of_rows(counts, role, url):
+    (small_queries, small_bytes), (large_queries, large_bytes) = counts[url]
+    assert large_bytes > small_bytes, 'the larger data set should render more rows'
+    assert large_queries == small_queries
@@ -0,0 +1,124 @@
+"""Read/write routing between the primary and the replica, and the staleness bound."""
+import os
+import sqlite3
+import time
+import pytest
+from flask import Flask, g
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, text
+from models.routing import REPLICA_BIND, RoutingSession
+from services.replica import ReplicaSync
+
+
+@pytest.fixture
+def routed(tmp_path):
+    """A throwaway app whose session routes between two SQLite files."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'primary.db'}"
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: f"sqlite:///{tmp_path / 'replica.db'}"}
+    db = SQLAlchemy(app, session_options={'class_': RoutingSession})
+
+    class Note(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+
+    with app.app_context():
+        db.create_all()
+        engines = {'primary': db.engines[None], 'replica': db.engines[REPLICA_BIND]}
+    return app, db, Note, engines
+
+
+def bind_name(engines, engine):
+    return next(name for name, candidate in engines.items() if candidate is engine)
+
+
+def test_reads_go_to_the_replica_when_allowed(routed):
+    app, db, Note, engines = routed
+    with app.test_request_context():
+        g.db_replica = True
+        assert bind_name(engines, db.session.get_bind(clause=select(Note))) == 'replica'
+        assert bind_name(engines, db.session.get_bind(clause=text('SELECT 1'))) == 'replica'
+        assert not g.get('db_wrote')
+
+
+def test_pinned_requests_read_the_primary(routed):
+    app, db, Note, engines = routed
+    with app.test_request_context():
+        g.db_replica = False
+        assert bind_name(engines, db.session.get_bind(clause=select(Note))) == 'primary'
+    with app.test_request_context():
+        assert bind_name(engines, db.session.get_bind(clause=select(Note))) == 'primary'
+
+
+def test_writes_go_to_the_primary_and_are_noted(routed):
+    app, db, Note, engines = routed
+    with app.test_request_context():
+        g.db_replica = True
+        assert bind_name(engines, db.session.get_bind(clause=text('DELETE FROM note'))) == 'primary'
+        assert g.db_wrote
+    with app.test_request_context():
+        g.db_replica = True
+        db.session.add(Note())
+        db.session.commit()
+        assert g.db_wrote
+    primary = sqlite3.connect(engines['primary'].url.database)
+    assert primary.execute('SELECT count(*) FROM note').fetchone() == (1,)
+
+
+def test_sync_copies_the_primary(tmp_path):
+    primary_path, replica_path = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    with sqlite3.connect(primary_path) as conn:
+        conn.execute('CREATE TABLE note (id INTEGER PRIMARY KEY)')
+        conn.execute('INSERT INTO note VALUES (1)')
+    replica = ReplicaSync(f'sqlite:///{primary_path}', f'sqlite:///{replica_path}')
+    before = time.time()
+    synced_at = replica.sync()
+    assert before <= synced_at == replica.synced_at <= time.time()
+    assert os.path.exists(replica_path)
+    assert sqlite3.connect(replica_path).execute('SELECT id FROM note').fetchall() == [(1,)]
+
+
+def test_never_synced_replica_is_not_served(tmp_path):
+    replica = ReplicaSync(f"sqlite:///{tmp_path / 'a.db'}", f"sqlite:///{tmp_path / 'b.db'}")
+    assert not replica.serves(max_lag=3600)
+
+
+@pytest.mark.parametrize('age,max_lag,expected', [
+    (1, 15, True),
+    (14, 15, True),
+    (16, 15, False),
+    (600, 15, False),
+])
+def test_lag_bound(tmp_path, age, max_lag, expected):
+    replica = ReplicaSync(f"sqlite:///{tmp_path / 'a.db'}", f"sqlite:///{tmp_path / 'b.db'}")
+    replica.synced_at = time.time() - age
+    assert replica.serves(max_lag) is expected
+
+
+@pytest.mark.parametrize('write_offset,expected', [
+    (-5, True),    # the write happened before the snapshot started
+    (0, False),    # same instant: the snapshot may not include it
+    (5, False),    # written after the snapshot
+])
+def test_since_bound(tmp_path, write_offset, expected):
+    replica = ReplicaSync(f"sqlite:///{tmp_path / 'a.db'}", f"sqlite:///{tmp_path / 'b.db'}")
+    replica.synced_at = time.time() - 10
+    assert replica.serves(max_lag=60, since=replica.synced_at + write_offset) is expected
+
+
+def test_relative_uris_sync_the_files_the_engines_use(tmp_path, monkeypatch):
+    instance, elsewhere = tmp_path / 'instance', tmp_path / 'cwd'
+    elsewhere.mkdir()
+    monkeypatch.chdir(elsewhere)
+    app = Flask(__name__, instance_path=str(instance))
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///primary.db'
+    app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: 'sqlite:///replica.db'}
+    db = SQLAlchemy(app)
+    with app.app_context():
+        with db.engines[None].begin() as conn:
+            conn.execute(text('CREATE TABLE note (id INTEGER PRIMARY KEY)'))
+            conn.execute(text('INSERT INTO note VALUES (1)'))
+        replica = ReplicaSync(db.engines[None].url, db.engines[REPLICA_BIND].url)
+        replica.sync()
+        with db.engines[REPLICA_BIND].connect() as conn:
+            assert conn.execute(text('SELECT id FROM note')).fetchall() == [(1,)]
+    assert os.listdir(elsewhere) == []
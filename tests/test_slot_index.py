@@ -0,0 +1,36 @@
+"""Days that enter the slot-index horizon are indexed from the old horizon on."""
+from datetime import date, timedelta
+from sqlalchemy import text
+
+
+def test_days_after_the_old_horizon_are_indexed(app):
+    from models import db, User, Doctor, WeeklyAvailability, SlotBitmap
+    from services import extend_slot_index
+    today = date.today()
+    with app.app_context():
+        user = User(email='horizon-doctor@hospital.com', password='x', role='doctor')
+        db.session.add(user)
+        db.session.flush()
+        doctor = Doctor(user_id=user.id, department_id=1, name='Dr. Horizon')
+        db.session.add(doctor)
+        db.session.flush()
+        db.session.add_all([WeeklyAvailability(doctor_id=doctor.id, weekday=day, start_time='09:00',
+                                               end_time='12:00') for day in range(7)])
+        db.session.execute(text("UPDATE counters SET value = :end WHERE entity = 'slot_index' AND status = 'horizon'"),
+                           {'end': (today + timedelta(days=17)).toordinal()})
+        db.session.query(SlotBitmap).filter(SlotBitmap.date > today + timedelta(days=17)).delete()
+        db.session.commit()
+
+        assert extend_slot_index(db.session, today + timedelta(days=20), 30) == 3
+        db.session.commit()
+
+        indexed = {day for (day,) in db.session.query(SlotBitmap.date).filter_by(doctor_id=doctor.id)}
+        assert {today + timedelta(days=n) for n in (18, 19, 20)} <= indexed
+
+
+def test_covered_horizon_is_left_alone(app):
+    from models import db
+    from services import extend_slot_index
+    from services.slot_index import indexed_through
+    with app.app_context():
+        assert extend_slot_index(db.session, indexed_through(db.session), 30) == 0